@@ -3,30 +3,96 @@ FastAPI Backend - Trích xuất dữ liệu JD và CV từ Base Hiring API
 """
 from fastapi import FastAPI, Query, HTTPException, Path
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import threading
+from contextlib import asynccontextmanager
+import multiprocessing
 from time import time
-import pdfplumber
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
-from sklearn.feature_extraction.text import TfidfVectorizer
+from cachetools import TTLCache, LRUCache
+from collections import defaultdict
 try:
     from docx import Document
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
-from sklearn.metrics.pairwise import cosine_similarity
+try:
+    import pymupdf as fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    try:
+        # PyMuPDF bản cũ chỉ có module fitz
+        import fitz
+        FITZ_AVAILABLE = True
+    except ImportError:
+        FITZ_AVAILABLE = False
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+try:
+    # selectolax >= 1.0 chỉ còn backend lexbor (selectolax.parser/Modest đã bị bỏ)
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+try:
+    from lxml import html as lxml_html, etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+try:
+    from rapidfuzz import process as fuzz_process, fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 import numpy as np
 from pytz import timezone
 import re
+import json
+import hashlib
+import unicodedata
+from functools import lru_cache
 from html import unescape
+
+@asynccontextmanager
+async def lifespan(app):
+    """Vòng đời ứng dụng: khi tắt server thì giải phóng process pool parse PDF và đóng session HTTP dùng chung"""
+    yield
+    _shutdown_pdf_executor()
+    _SESSION.close()
+
 app = FastAPI(
     title="Base Hiring API - JD và CV Extractor",
     description="API để trích xuất dữ liệu JD (Job Description) và CV từ Base Hiring API",
-    version="v2.0.0"
+    version="v2.0.0",
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -52,87 +118,286 @@ GOOGLE_SHEET_SCRIPT_URL = os.getenv('GOOGLE_SHEET_SCRIPT_URL', None)
 # Account API Key (optional) - để lấy thông tin users cho reviews
 ACCOUNT_API_KEY = os.getenv('ACCOUNT_API_KEY', None)
 
+# HTTP session dùng chung cho mọi request ra ngoài (keep-alive, tái sử dụng kết nối TLS)
+HTTP_POOL_CONNECTIONS = 10   # số host khác nhau được giữ pool
+HTTP_POOL_MAXSIZE = 100      # số kết nối tối đa mỗi host
+# Retry lỗi gateway tạm thời; các API Base dùng ở đây đều chỉ đọc nên retry cả POST là an toàn
+_http_retry = Retry(
+    total=2,
+    backoff_factor=0.2,
+    status_forcelist=[502, 503, 504],
+    allowed_methods=frozenset(['GET', 'HEAD', 'POST'])
+)
+_SESSION = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=_http_retry)
+_SESSION.mount('https://', _http_adapter)
+_SESSION.mount('http://', _http_adapter)
+
 # Cache configuration
 CACHE_TTL = 300  # 5 phút cache
+SHEET_CACHE_TTL = int(os.getenv('SHEET_CACHE_TTL', 60))  # dữ liệu bài test trên Google Sheet, TTL ngắn hơn
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))  # cache payload endpoint
+CANDIDATE_CACHE_TTL = int(os.getenv('CANDIDATE_CACHE_TTL', 60))  # chi tiết ứng viên thay đổi thường xuyên, TTL ngắn
 _cache = {
-    'openings': {'data': None, 'timestamp': 0},
-    'job_descriptions': {'data': None, 'timestamp': 0},
-    'users_info': {'data': None, 'timestamp': 0}
+    'opening_list': TTLCache(maxsize=16, ttl=CACHE_TTL),  # payload opening/list gốc + hash nội dung
+    'openings': TTLCache(maxsize=16, ttl=CACHE_TTL),
+    'openings_index': TTLCache(maxsize=16, ttl=CACHE_TTL),  # map id/tên -> opening + tuple tên để so khớp
+    'job_descriptions': TTLCache(maxsize=16, ttl=CACHE_TTL),
+    'users_info': TTLCache(maxsize=4, ttl=CACHE_TTL),
+    'sheet_data': TTLCache(maxsize=1, ttl=SHEET_CACHE_TTL),  # toàn bộ dòng bài test đọc từ Google Sheet
+    'test_results': TTLCache(maxsize=1, ttl=SHEET_CACHE_TTL),  # candidate_id -> bài test (đọc cả sheet một lần)
+    'sheet_index': TTLCache(maxsize=1, ttl=SHEET_CACHE_TTL),  # index tên ứng viên + vị trí trên Google Sheet
+    'cv_texts': TTLCache(maxsize=512, ttl=CACHE_TTL),  # cv_url -> text (lớp cache trong process, trước Redis)
+    'responses': TTLCache(maxsize=256, ttl=RESPONSE_CACHE_TTL),  # payload endpoint không tham số cá nhân hóa (JD list, feedback)
+    'candidate_details': TTLCache(maxsize=256, ttl=CANDIDATE_CACHE_TTL)  # candidate/get gốc theo candidate_id
 }
+# Lượt nạp đang chạy theo (tên cache, key): chỉ một thread gọi loader cho mỗi key khi miss (tránh thundering herd),
+# các key khác của cùng cache không phải chờ
+_inflight = {}
+_inflight_lock = threading.Lock()
+# TTLCache không thread-safe, mọi thao tác đọc/ghi đều đi qua khóa ngắn này
+_cache_data_lock = threading.Lock()
+# JD đã parse theo hash nội dung opening/list: payload không đổi thì không parse lại HTML
+_jd_by_digest = LRUCache(maxsize=16)
+# Index id -> JD cho từng snapshot danh sách JD: id(list) -> (list, dict)
+_jd_index_by_list = LRUCache(maxsize=16)
+# Thời điểm tải opening/list gần nhất từ Base API theo api_key (giới hạn lượt làm mới JD khi không tìm thấy)
+_opening_list_fetched_at = LRUCache(maxsize=16)
+JD_REFRESH_MIN_INTERVAL = int(os.getenv('JD_REFRESH_MIN_INTERVAL', 30))
+
+# Redis (optional) - cache dùng chung giữa các worker cho JD và text CV đã trích xuất
+REDIS_URL = os.getenv('REDIS_URL', None)
+REDIS_CACHE_TTL = int(os.getenv('REDIS_CACHE_TTL', CACHE_TTL))
+CV_CACHE_TTL = int(os.getenv('CV_CACHE_TTL', 24 * 3600))  # text CV chứa PII, TTL cấu hình riêng
+_redis = redis.Redis.from_url(REDIS_URL) if REDIS_AVAILABLE and REDIS_URL else None
+
+# PDF parser configuration
+PDF_MIN_TEXT_CHARS = 50  # Ít hơn số ký tự này coi như PDF scan/ảnh
+PDF_PARSER_CHOICE_MAX = 1024
+_pdf_parser_choice = LRUCache(maxsize=PDF_PARSER_CHOICE_MAX)  # nguồn PDF (URL) -> parser đã chọn
+
+# Process pool cho phần parse PDF (CPU-bound, giữ GIL) để không tuần tự hóa các request
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', os.cpu_count() or 1))
+# Không fork từ process uvicorn đa luồng (process con có thể kẹt ở khóa do thread khác đang giữ)
+_PDF_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+# Tải file CV theo stream, giới hạn số lượt tải đồng thời để chặn trần bộ nhớ
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_CONCURRENCY = int(os.getenv('DOWNLOAD_CONCURRENCY', 32))
+_download_semaphore = threading.BoundedSemaphore(DOWNLOAD_CONCURRENCY)
+OFFER_FILE_WORKERS = 4  # số file đính kèm của một message được tải song song
+CV_PREFETCH_WORKERS = int(os.getenv('CV_PREFETCH_WORKERS', 16))  # số tác vụ CV/bài test chạy song song cho một vị trí
+
+# HTML -> text
+_HSPACE_RE = re.compile(r'[ \t\xa0]+')     # khoảng trắng ngang (giữ nguyên xuống dòng)
+_HTML_ENTITY_RE = re.compile(r'&#?\w+;')  # entity còn sót lại (HTML bị escape 2 lần)
+_BR_TAG_RE = re.compile(r'<br\s*/?>')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+_WS_RE = re.compile(r'\s+')
+_LINK_SELECTOR = 'a[href]'  # link file đính kèm trong nội dung message
+_BS_PARSER = 'lxml' if LXML_AVAILABLE else 'html.parser'  # parser cho nhánh fallback BeautifulSoup
+
+# Timezone & định dạng ngày (tạo một lần, tránh đọc lại tzdata mỗi request)
+HCM_TZ = timezone('Asia/Ho_Chi_Minh')
+# Cột Time của Google Sheet: 'YYYY-MM-DD' hoặc 'DD/MM/YYYY' (dự phòng 'MM/DD/YYYY'), có thể kèm ' HH:MM:SS'
+_SHEET_DATE_RE = re.compile(
+    r'^(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})/(\d{1,2})/(\d{4}))(?:\s+\d{1,2}:\d{1,2}:\d{1,2})?$'
+)
+
+# Câu hỏi / câu trả lời trong nội dung bài test (Google Sheet)
+# Dùng RE2 (DFA, thời gian tuyến tính) nếu có; cờ DOTALL viết inline '(?s)' để dùng được cho cả re và re2
+_TEST_QA_RE = (re2 if RE2_AVAILABLE else re).compile(
+    r"(?s)Câu hỏi (\d+)\.(.*?)\nCâu trả lời của thí sinh\s*(.*?)\s*Đây là câu hỏi mở"
+)
 
 # =================================================================
 # Helper Functions (Không thay đổi)
 # =================================================================
 
-def get_base_openings(api_key, use_cache=True):
-    """Truy xuất vị trí tuyển dụng đang hoạt động từ Base API (có cache)"""
-    current_time = time()
-    if not api_key:
-        raise HTTPException(status_code=500, detail="BASE_API_KEY chưa được cấu hình")
-    
-    # Kiểm tra cache nếu được bật
-    if use_cache and _cache['openings']['data'] is not None:
-        if current_time - _cache['openings']['timestamp'] < CACHE_TTL:
-            return _cache['openings']['data']
+def _get_cached(name, key, loader, use_cache=True):
+    """Lấy giá trị từ TTL cache `name`, gọi loader khi miss (single-flight theo từng key, loader chạy ngoài khóa).
     
-    url = "https://hiring.base.vn/publicapi/v2/opening/list"
-    payload = {'access_token': api_key}
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    Loader trả về None nghĩa là không lưu kết quả vào cache.
+    """
+    if not use_cache:
+        return loader()
+    
+    cache = _cache[name]
+    with _cache_data_lock:
+        value = cache.get(key)
+    if value is not None:
+        return value
+    
+    flight_key = (name, key)
+    with _inflight_lock:
+        future = _inflight.get(flight_key)
+        is_owner = future is None
+        if is_owner:
+            # Kiểm tra lại: thread khác có thể vừa nạp xong trước khi lấy được khóa
+            with _cache_data_lock:
+                value = cache.get(key)
+            if value is not None:
+                return value
+            future = Future()
+            _inflight[flight_key] = future
+    if not is_owner:
+        return future.result()
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API: {e}")
+        value = loader()
+        if value is not None:
+            with _cache_data_lock:
+                cache[key] = value
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(flight_key, None)
+
+def _json_loads(content):
+    """Parse JSON (bytes/str) bằng orjson nếu có, fallback json"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _json_dumps(value):
+    """Serialize JSON bằng orjson nếu có, fallback json"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False)
+
+@lru_cache(maxsize=1024)
+def parse_iso_date(value):
+    """Parse chuỗi 'YYYY-MM-DD' thành date (có cache, raise ValueError nếu sai định dạng)"""
+    # date.fromisoformat (C) cho chuỗi 10 ký tự chuẩn; strptime chỉ còn cho dạng không đệm số 0 (vd '2024-1-5')
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+@lru_cache(maxsize=4096)
+def parse_sheet_date(time_str):
+    """Parse cột Time của Google Sheet theo các định dạng phổ biến, trả về date hoặc None (có cache)"""
+    match = _SHEET_DATE_RE.match(time_str)
+    if not match:
+        return None
+    year, month, day, first, second, year_dmy = match.groups()
+    try:
+        if year:
+            return date(int(year), int(month), int(day))
+        try:
+            return date(int(year_dmy), int(second), int(first))  # DD/MM/YYYY
+        except ValueError:
+            return date(int(year_dmy), int(first), int(second))  # MM/DD/YYYY
+    except ValueError:
+        return None
+
+def _hash_key(value):
+    """Băm giá trị nhạy cảm (API key, URL) trước khi dùng làm cache key"""
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
 
-    data = response.json()
-    openings = data.get('openings', [])
+def _shared_cached(key, ttl, loader, refresh=False):
+    """Đọc/ghi kết quả của loader qua Redis (nếu được cấu hình). Lỗi Redis không làm gián đoạn flow chính."""
+    if _redis is None:
+        return loader()
     
-    # Lọc vị trí với trạng thái '10' (đang hoạt động)
-    filtered_openings = [
-        {"id": opening['id'], "name": opening['name']}
-        for opening in openings
-        if opening.get('status') == '10'
-    ]
+    if not refresh:
+        try:
+            cached = _redis.get(key)
+            if cached is not None:
+                return _json_loads(cached)
+        except Exception:
+            pass
     
-    # Lưu vào cache
-    if use_cache:
-        _cache['openings'] = {'data': filtered_openings, 'timestamp': current_time}
+    value = loader()
+    if value is not None:
+        try:
+            _redis.set(key, _json_dumps(value), ex=ttl)
+        except Exception:
+            pass
+    return value
+
+def _get_opening_list(api_key, use_cache=True):
+    """Lấy payload opening/list (dùng chung cho openings và JD), trả về (data, hash nội dung)"""
+    def load():
+        url = "https://hiring.base.vn/publicapi/v2/opening/list"
+        payload = {'access_token': api_key}
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        
+        try:
+            response = _SESSION.post(url, headers=headers, data=payload, timeout=10)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API: {e}")
+        
+        data = _json_loads(response.content)
+        digest = hashlib.sha1(response.content).hexdigest()
+        with _cache_data_lock:
+            _opening_list_fetched_at[api_key] = time()
+        return data, digest
     
-    return filtered_openings
+    return _get_cached('opening_list', api_key, load, use_cache)
 
-def get_job_descriptions(api_key, use_cache=True):
-    """Truy xuất JD (Job Description) từ các vị trí tuyển dụng đang mở (có cache)"""
-    current_time = time()
+def get_base_openings(api_key, use_cache=True):
+    """Truy xuất vị trí tuyển dụng đang hoạt động từ Base API (có cache)"""
     if not api_key:
         raise HTTPException(status_code=500, detail="BASE_API_KEY chưa được cấu hình")
+    
+    def load():
+        data, _ = _get_opening_list(api_key, use_cache)
+        openings = data.get('openings', [])
+        
+        # Lọc vị trí với trạng thái '10' (đang hoạt động)
+        return [
+            {"id": opening['id'], "name": opening['name']}
+            for opening in openings
+            if opening.get('status') == '10'
+        ]
+    
+    return _get_cached('openings', api_key, load, use_cache)
 
-    # Kiểm tra cache
-    if use_cache and _cache['job_descriptions']['data'] is not None:
-        if current_time - _cache['job_descriptions']['timestamp'] < CACHE_TTL:
-            return _cache['job_descriptions']['data']
+def get_openings_index(api_key, use_cache=True):
+    """Index các vị trí đang mở (có cache cùng TTL): danh sách, tuple tên để so khớp và map id/tên -> opening"""
+    def load():
+        openings = get_base_openings(api_key, use_cache)
+        # Giữ đúng thứ tự ưu tiên cũ: opening đầu tiên có id hoặc tên trùng với query
+        by_key = {}
+        for opening in openings:
+            by_key.setdefault(opening['id'], opening)
+            by_key.setdefault(opening['name'], opening)
+        names = tuple(opening['name'] for opening in openings)
+        return {
+            'openings': openings,
+            'names': names,
+            # Chuẩn hóa (casefold, bỏ dấu) một lần lúc nạp cache thay vì mỗi request
+            'normalized_names': tuple(normalize_name(name) for name in names),
+            'by_key': by_key
+        }
     
-    url = "https://hiring.base.vn/publicapi/v2/opening/list"
-    payload = {'access_token': api_key}
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    return _get_cached('openings_index', api_key, load, use_cache)
 
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API: {e}")
+def get_job_descriptions(api_key, use_cache=True):
+    """Truy xuất JD (Job Description) từ các vị trí tuyển dụng đang mở (có cache)"""
+    if not api_key:
+        raise HTTPException(status_code=500, detail="BASE_API_KEY chưa được cấu hình")
 
-    data = response.json()
-    
-    if 'openings' in data:
-        openings = data['openings']
+    def parse(data):
         results = []
-        
-        for opening in openings:
+        for opening in data['openings']:
             if opening.get('status') == '10':  # Chỉ lấy vị trí đang mở
                 html_content = opening.get('content', '')
-                soup = BeautifulSoup(html_content, "html.parser")
-                text_content = soup.get_text()
+                text_content = html_to_text(html_content)
                 
                 if len(text_content) >= 10:  # Chỉ lấy JD có nội dung đủ dài
                     results.append({
@@ -141,18 +406,129 @@ def get_job_descriptions(api_key, use_cache=True):
                         "job_description": text_content.strip(),
                         "html_content": html_content
                     })
+        return results
+
+    def load():
+        data, digest = _get_opening_list(api_key, use_cache)
+        if 'openings' not in data:
+            return None
         
-        if use_cache:
-            _cache['job_descriptions'] = {'data': results, 'timestamp': current_time}
-        
+        # Nội dung không đổi so với lần parse trước -> dùng lại kết quả
+        with _cache_data_lock:
+            results = _jd_by_digest.get(digest)
+        if results is None:
+            results = parse(data)
+            with _cache_data_lock:
+                _jd_by_digest[digest] = results
         return results
-    return []
+    
+    def load_shared():
+        return _shared_cached(f"jd:list:{_hash_key(api_key)}:v2", REDIS_CACHE_TTL, load, refresh=not use_cache)
+    
+    if not use_cache:
+        # Làm mới cưỡng bức: ghi danh sách mới vào cache, các request sau không đọc lại danh sách cũ
+        # (is_job_descriptions_cache_stale đã False sau lần tải này)
+        results = load_shared()
+        if results is not None:
+            with _cache_data_lock:
+                _cache['job_descriptions'][api_key] = results
+        return results or []
+    
+    return _get_cached('job_descriptions', api_key, load_shared) or []
+
+def get_job_descriptions_indexed(api_key, use_cache=True):
+    """Như get_job_descriptions nhưng trả về thêm dict id -> JD (dựng một lần cho mỗi snapshot danh sách JD)"""
+    jds = get_job_descriptions(api_key, use_cache)
+    with _cache_data_lock:
+        entry = _jd_index_by_list.get(id(jds))
+    # Giữ tham chiếu tới list trong entry: so sánh `is` để id() của list đã bị thu hồi không bị dùng nhầm
+    if entry is None or entry[0] is not jds:
+        jd_by_id = {}
+        for jd in jds:
+            jd_by_id.setdefault(jd['id'], jd)
+        entry = (jds, jd_by_id)
+        with _cache_data_lock:
+            _jd_index_by_list[id(jds)] = entry
+    return entry
+
+def is_job_descriptions_cache_stale(api_key):
+    """True nếu opening/list chưa được tải từ Base API trong JD_REFRESH_MIN_INTERVAL giây gần nhất"""
+    with _cache_data_lock:
+        fetched_at = _opening_list_fetched_at.get(api_key)
+    return fetched_at is None or time() - fetched_at > JD_REFRESH_MIN_INTERVAL
+
+def get_job_description_by_id(opening_id, api_key):
+    """Tìm JD theo opening_id qua dict index, làm mới cache một lần nếu không thấy (và dữ liệu chưa vừa được tải)"""
+    _, jd_by_id = get_job_descriptions_indexed(api_key, use_cache=True)
+    jd = jd_by_id.get(opening_id)
+    # Opening không có JD (nội dung quá ngắn) thì không gọi lại upstream mỗi request khi dữ liệu vừa mới tải
+    if not jd and is_job_descriptions_cache_stale(api_key):
+        # Thử làm mới cache nếu không tìm thấy
+        _, jd_by_id = get_job_descriptions_indexed(api_key, use_cache=False)
+        jd = jd_by_id.get(opening_id)
+    return jd
+
+def lxml_text_content(html_content):
+    """Lấy text bằng lxml.html (C), None nếu không có lxml hoặc lxml không parse được"""
+    if not LXML_AVAILABLE:
+        return None
+    try:
+        return lxml_html.fromstring(html_content).text_content()
+    except Exception:
+        return None
+
+def lxml_stripped_strings(html_content):
+    """Các đoạn text đã strip theo thứ tự tài liệu bằng lxml (như BeautifulSoup.stripped_strings), None nếu không dùng được lxml"""
+    if not LXML_AVAILABLE:
+        return None
+    try:
+        root = lxml_html.fromstring(html_content)
+    except Exception:
+        return None
+    # stripped_strings của BeautifulSoup bỏ qua nội dung script/style
+    lxml_etree.strip_elements(root, 'script', 'style', 'template', with_tail=False)
+    return [text for text in (piece.strip() for piece in root.itertext()) if text]
+
+def html_to_text(html_content):
+    """Chuyển nội dung HTML (JD) thành text thuần túy bằng selectolax, fallback lxml rồi BeautifulSoup"""
+    if not html_content:
+        return ""
+    if SELECTOLAX_AVAILABLE:
+        root = HTMLParser(html_content).root
+        text = root.text(separator='') if root is not None else ""
+    else:
+        text = lxml_text_content(html_content)
+        if text is None:
+            from bs4 import BeautifulSoup
+            text = BeautifulSoup(html_content, _BS_PARSER).get_text()
+    if '&' in text and _HTML_ENTITY_RE.search(text):
+        text = unescape(text)
+    return _HSPACE_RE.sub(' ', text)
 
 def extract_message(evaluations):
     """Trích xuất nội dung văn bản từ đánh giá HTML"""
     if isinstance(evaluations, list) and len(evaluations) > 0:
         raw_html = evaluations[0].get('content', '')
-        soup = BeautifulSoup(raw_html, "html.parser")
+        if '<' not in raw_html:
+            # Nội dung text thuần (không có tag) -> bỏ qua bước parse HTML
+            return unescape(raw_html).strip()
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(raw_html)
+            # Như stripped_strings: bỏ script/style, strip từng text node rồi nối bằng khoảng trắng
+            tree.strip_tags(['script', 'style', 'template'])
+            if tree.root is None:
+                return ""
+            pieces = (
+                (node.text_content or '').strip()
+                for node in tree.root.traverse(include_text=True) if node.tag == '-text'
+            )
+            return " ".join(text for text in pieces if text)
+        # Nối từng đoạn text bằng khoảng trắng: text_content() dính liền chữ giữa các <p>/<li>/<br>
+        strings = lxml_stripped_strings(raw_html)
+        if strings is not None:
+            return " ".join(strings)
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(raw_html, _BS_PARSER)
         text = " ".join(soup.stripped_strings)
         return text
     return None
@@ -161,14 +537,16 @@ def remove_html_tags(text):
     """Bỏ HTML tags và chuyển đổi thành text thuần túy"""
     if not text:
         return ""
-    # Chuyển các thẻ <br> thành xuống dòng
-    text = re.sub(r'<br\s*/?>', '\n', text)
-    # Bỏ tất cả các thẻ HTML còn lại
-    text = re.sub(r'<[^>]+>', '', text)
+    # Chỉ chạy regex tag khi text thực sự có HTML
+    if '<' in text:
+        # Chuyển các thẻ <br> thành xuống dòng
+        text = _BR_TAG_RE.sub('\n', text)
+        # Bỏ tất cả các thẻ HTML còn lại
+        text = _HTML_TAG_RE.sub('', text)
     # Unescape các ký tự HTML entities (&lt;, &gt;, &amp;, etc.)
     text = unescape(text)
     # Loại bỏ các khoảng trắng thừa
-    text = re.sub(r'\n\s*\n', '\n', text)
+    text = _BLANK_LINES_RE.sub('\n', text)
     return text.strip()
 
 def get_users_info(use_cache=True):
@@ -176,19 +554,12 @@ def get_users_info(use_cache=True):
     if not ACCOUNT_API_KEY:
         return {}
     
-    current_time = time()
-    
-    # Kiểm tra cache
-    if use_cache and _cache['users_info']['data'] is not None:
-        if current_time - _cache['users_info']['timestamp'] < CACHE_TTL:
-            return _cache['users_info']['data']
-    
-    try:
+    def load():
         users_url = "https://account.base.vn/extapi/v1/users"
         users_payload = {'access_token': ACCOUNT_API_KEY}
-        users_response = requests.post(users_url, data=users_payload, timeout=10)
+        users_response = _SESSION.post(users_url, data=users_payload, timeout=10)
         users_response.raise_for_status()
-        users_data = users_response.json()
+        users_data = _json_loads(users_response.content)
         
         # Tạo dictionary để map username -> name + title
         username_to_info = {}
@@ -202,28 +573,24 @@ def get_users_info(use_cache=True):
                     if name == "Hoang Tran":
                         title = "CEO"
                     
-                    # Kết hợp name và title
-                    if title:
-                        username_to_info[username] = {"name": name, "title": title}
-                    else:
-                        username_to_info[username] = {"name": name, "title": ""}
-        
-        # Lưu vào cache
-        if use_cache:
-            _cache['users_info'] = {'data': username_to_info, 'timestamp': current_time}
-        
+                    # Kết hợp name và title (luôn có key title)
+                    username_to_info[username] = {"name": name, "title": title or ""}
         return username_to_info
+    
+    try:
+        return _get_cached('users_info', ACCOUNT_API_KEY, load, use_cache)
     except Exception as e:
-        # Nếu có lỗi, trả về dict rỗng
+        # Nếu có lỗi, trả về dict rỗng (không lưu vào cache)
         return {}
 
-def process_evaluations(evaluations):
+def process_evaluations(evaluations, username_to_info=None):
     """Xử lý evaluations và trả về danh sách reviews với đầy đủ thông tin (tên, chức danh, nội dung)"""
     if not isinstance(evaluations, list) or len(evaluations) == 0:
         return []
     
-    # Lấy thông tin users
-    username_to_info = get_users_info(use_cache=True)
+    # Lấy thông tin users (caller xử lý nhiều ứng viên có thể truyền sẵn để lấy một lần)
+    if username_to_info is None:
+        username_to_info = get_users_info(use_cache=True)
     
     reviews = []
     for eval_item in evaluations:
@@ -247,30 +614,182 @@ def process_evaluations(evaluations):
     
     return reviews
 
+# Dấu hiệu PDF có bảng: thẻ cấu trúc /Table hoặc dòng có nhiều cột cách nhau bởi khoảng trắng dài
+_PDF_TABLE_TAG = b'/Table'
+_TABLE_LINE_RE = re.compile(r'\S {3,}\S.* {3,}\S')
+
+def _join_pdf_pages(page_texts):
+    """Ghép text các trang theo định dạng '--- Trang N ---'"""
+    text = ""
+    for page_num, page_text in enumerate(page_texts, 1):
+        if page_text:
+            text += f"\n--- Trang {page_num} ---\n"
+            text += page_text
+    return text.strip() if text else None
+
+def _looks_tabular(pdf_bytes, page_texts):
+    """Heuristic rẻ để nhận biết CV dạng bảng (pdfplumber xử lý bảng tốt hơn)"""
+    if _PDF_TABLE_TAG in pdf_bytes:
+        return True
+    return any(_TABLE_LINE_RE.search(page_text) for page_text in page_texts if page_text)
+
+def _extract_pages_pdfium(pdf_bytes):
+    """Trích xuất text từng trang bằng pypdfium2"""
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        page_texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+            textpage.close()
+            page.close()
+        return page_texts
+    finally:
+        pdf.close()
+
+def _extract_pages_fitz(pdf_bytes):
+    """Trích xuất text từng trang bằng PyMuPDF"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [page.get_text("text") for page in doc]
+    finally:
+        doc.close()
+
+def _plumber_page_text(page):
+    """Lấy text một trang pdfplumber rồi giải phóng ngay cache chars/objects của trang đó"""
+    text = page.extract_text()
+    page.flush_cache()
+    return text
+
+def _extract_pages_pdfplumber(pdf_bytes):
+    """Trích xuất text từng trang bằng pdfplumber"""
+    import pdfplumber
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        return [_plumber_page_text(page) for page in pdf.pages]
+
+def _extract_pages_pdfminer(pdf_bytes):
+    """Trích xuất text bằng pdfminer.six high-level API (bỏ qua object model của pdfplumber)"""
+    from pdfminer.high_level import extract_text
+    from pdfminer.layout import LAParams
+    text = extract_text(BytesIO(pdf_bytes), laparams=LAParams(line_margin=0.5))
+    # pdfminer ngăn cách các trang bằng form feed
+    page_texts = text.split('\f')
+    if page_texts and not page_texts[-1].strip():
+        page_texts.pop()
+    return page_texts
+
+_PDF_PARSERS = {
+    'pdfium': _extract_pages_pdfium,
+    'fitz': _extract_pages_fitz,
+    'pdfminer': _extract_pages_pdfminer,
+    'pdfplumber': _extract_pages_pdfplumber,
+}
+
+def _select_and_extract_pdf(pdf_bytes):
+    """Chọn parser phù hợp: pypdfium2 -> PyMuPDF (nếu text quá ngắn) -> pdfplumber (nếu có bảng) / pdfminer"""
+    page_texts, parser = None, None
+    for name, available in (('pdfium', PDFIUM_AVAILABLE), ('fitz', FITZ_AVAILABLE)):
+        if not available:
+            continue
+        try:
+            page_texts = _PDF_PARSERS[name](pdf_bytes)
+        except Exception:
+            continue
+        parser = name
+        # Text quá ngắn thường là PDF scan/ảnh, thử parser tiếp theo
+        if sum(len(page_text or '') for page_text in page_texts) >= PDF_MIN_TEXT_CHARS:
+            break
+    
+    tabular = _looks_tabular(pdf_bytes, page_texts or [])
+    if parser is None or tabular:
+        # CV dạng bảng cần pdfplumber; còn lại dùng pdfminer trực tiếp (nhanh hơn), pdfplumber dự phòng
+        for name in (('pdfplumber',) if tabular else ('pdfminer', 'pdfplumber')):
+            try:
+                return _join_pdf_pages(_PDF_PARSERS[name](pdf_bytes)), name
+            except Exception:
+                continue
+        if parser is None:
+            return None, None
+    
+    return _join_pdf_pages(page_texts), parser
+
+def parse_pdf(pdf_bytes, preferred=None):
+    """Parse PDF bytes, trả về (text, parser). Hàm top-level để chạy được trong process pool"""
+    if preferred:
+        try:
+            text = _join_pdf_pages(_PDF_PARSERS[preferred](pdf_bytes))
+            if text:
+                return text, preferred
+        except Exception:
+            pass
+    return _select_and_extract_pdf(pdf_bytes)
+
+def _get_pdf_executor():
+    """Khởi tạo process pool parse PDF khi cần lần đầu (None nếu chỉ có 1 worker)"""
+    global _pdf_executor
+    if PDF_PARSE_WORKERS <= 1:
+        return None
+    if _pdf_executor is None:
+        with _pdf_executor_lock:
+            if _pdf_executor is None:
+                _pdf_executor = ProcessPoolExecutor(max_workers=PDF_PARSE_WORKERS, mp_context=_PDF_MP_CONTEXT)
+    return _pdf_executor
+
+def _shutdown_pdf_executor():
+    """Dừng process pool parse PDF"""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is not None:
+            _pdf_executor.shutdown(wait=False, cancel_futures=True)
+            _pdf_executor = None
+
+def extract_pdf_text(pdf_bytes, source_key=None):
+    """Trích xuất text từ PDF bytes, tái sử dụng parser đã chọn trước đó cho cùng nguồn (source_key)"""
+    preferred = None
+    if source_key:
+        with _cache_data_lock:
+            preferred = _pdf_parser_choice.get(source_key)
+    
+    executor = _get_pdf_executor()
+    if executor is not None:
+        try:
+            text, parser = executor.submit(parse_pdf, pdf_bytes, preferred).result()
+        except BrokenProcessPool:
+            # Worker bị chết (vd: OOM), tạo lại pool ở lần sau và parse ngay trong process hiện tại
+            _shutdown_pdf_executor()
+            text, parser = parse_pdf(pdf_bytes, preferred)
+    else:
+        text, parser = parse_pdf(pdf_bytes, preferred)
+    
+    if source_key and parser:
+        with _cache_data_lock:
+            _pdf_parser_choice[source_key] = parser
+    return text
+
+def _stream_download(url, out, timeout, headers=None):
+    """Tải file từ URL theo từng chunk vào buffer `out` (BytesIO) thay vì giữ toàn bộ response"""
+    with _download_semaphore:
+        with _SESSION.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                out.write(chunk)
+    return out
+
 def extract_text_from_pdf(url=None, file_bytes=None):
-    """Trích xuất text từ PDF URL hoặc file bytes bằng pdfplumber"""
-    pdf_file = None
+    """Trích xuất text từ PDF URL hoặc file bytes (pypdfium2/PyMuPDF, fallback pdfplumber cho CV dạng bảng)"""
+    pdf_bytes = None
     if file_bytes:
-        pdf_file = file_bytes
+        pdf_bytes = file_bytes.getvalue() if isinstance(file_bytes, BytesIO) else file_bytes
     elif url:
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            pdf_file = BytesIO(response.content)
+            pdf_bytes = _stream_download(url, BytesIO(), timeout=30).getvalue()
         except Exception:
             return None
     else:
         return None
     
     try:
-        text = ""
-        with pdfplumber.open(pdf_file) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text()
-                if page_text:
-                    text += f"\n--- Trang {page_num} ---\n"
-                    text += page_text
-        return text.strip() if text else None
+        return extract_pdf_text(pdf_bytes, source_key=url)
     except Exception as e:
         return None
 
@@ -291,19 +810,23 @@ def download_file_to_bytes(url):
         return None
     try:
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        return BytesIO(response.content)
+        file_bytes = _stream_download(url, BytesIO(), timeout=20, headers=headers)
+        file_bytes.seek(0)
+        return file_bytes
     except Exception:
         return None
 
+_TARGET_FILE_EXTS = ('.pdf', '.docx', '.doc')
+
 def is_target_file(url, name):
     """Kiểm tra xem file có phải PDF/DOCX/DOC không"""
     if not url or not name:
         return False
-    url_low = url.lower().split('?')[0]
-    name_low = name.lower()
-    return url_low.endswith(('.pdf', '.docx', '.doc')) or name_low.endswith(('.pdf', '.docx', '.doc'))
+    url_low = url.lower()
+    query_pos = url_low.find('?')
+    if query_pos >= 0:
+        url_low = url_low[:query_pos]
+    return url_low.endswith(_TARGET_FILE_EXTS) or name.lower().endswith(_TARGET_FILE_EXTS)
 
 def find_files_in_html(html_content):
     """Tìm các file PDF/DOCX/DOC trong HTML content"""
@@ -311,16 +834,41 @@ def find_files_in_html(html_content):
     if not html_content:
         return found
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        for a in soup.find_all('a', href=True):
-            href = a['href'].strip()
-            name = a.get_text().strip() or href.split('/')[-1]
+        if SELECTOLAX_AVAILABLE:
+            links = [
+                (a.attributes.get('href') or '', a.text())
+                for a in HTMLParser(html_content).css(_LINK_SELECTOR)
+            ]
+        else:
+            from bs4 import BeautifulSoup, SoupStrainer
+            soup = BeautifulSoup(html_content, _BS_PARSER, parse_only=SoupStrainer('a', href=True))
+            links = [(a['href'], a.get_text()) for a in soup.find_all('a', href=True)]
+        for href, text in links:
+            href = href.strip()
+            name = text.strip() or href.split('/')[-1]
             if is_target_file(href, name):
                 found.append((href, name))
         return found
     except Exception:
         return found
 
+def extract_offer_file_text(file_url, file_name):
+    """Tải một file đính kèm và trích xuất text (PDF/DOCX), None nếu không đọc được"""
+    file_bytes = download_file_to_bytes(file_url)
+    if not file_bytes:
+        return None
+    
+    ext = file_name.lower().split('.')[-1] if '.' in file_name else file_url.split('.')[-1].split('?')[0].lower()
+    text = None
+    
+    if 'pdf' in ext:
+        text = extract_text_from_pdf(file_bytes=file_bytes)
+    elif 'docx' in ext and DOCX_AVAILABLE:
+        text = extract_text_from_docx(file_bytes)
+    elif 'doc' == ext:
+        text = None  # File .doc cũ, không hỗ trợ
+    return text
+
 def get_offer_letter(candidate_id, api_key):
     """Lấy offer letter từ messages API của ứng viên"""
     if not candidate_id or not api_key:
@@ -334,9 +882,9 @@ def get_offer_letter(candidate_id, api_key):
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
-        data = response.json()
+        data = _json_loads(response.content)
         
         if not data or 'messages' not in data:
             return None
@@ -366,27 +914,26 @@ def get_offer_letter(candidate_id, api_key):
                 continue
             
             # Thử tải và trích xuất file đầu tiên tìm được
-            for file_url, file_name in all_files:
-                file_bytes = download_file_to_bytes(file_url)
-                if not file_bytes:
-                    continue
-                
-                ext = file_name.lower().split('.')[-1] if '.' in file_name else file_url.split('.')[-1].split('?')[0].lower()
-                text = None
-                
-                if 'pdf' in ext:
-                    text = extract_text_from_pdf(file_bytes=file_bytes)
-                elif 'docx' in ext and DOCX_AVAILABLE:
-                    text = extract_text_from_docx(file_bytes)
-                elif 'doc' == ext:
-                    text = None  # File .doc cũ, không hỗ trợ
-                
+            if len(all_files) == 1:
+                file_url, file_name = all_files[0]
+                text = extract_offer_file_text(file_url, file_name)
                 if text:
-                    return {
-                        "url": file_url,
-                        "name": file_name,
-                        "text": text
-                    }
+                    return {"url": file_url, "name": file_name, "text": text}
+                continue
+            
+            # Nhiều file: tải/trích xuất song song, vẫn ưu tiên file đứng trước có text
+            executor = ThreadPoolExecutor(max_workers=min(OFFER_FILE_WORKERS, len(all_files)))
+            try:
+                futures = [
+                    executor.submit(extract_offer_file_text, file_url, file_name)
+                    for file_url, file_name in all_files
+                ]
+                for (file_url, file_name), future in zip(all_files, futures):
+                    text = future.result()
+                    if text:
+                        return {"url": file_url, "name": file_name, "text": text}
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
         
         return None
     except Exception as e:
@@ -394,67 +941,187 @@ def get_offer_letter(candidate_id, api_key):
         return None
 
 def extract_text_from_cv_url(url):
-    """Trích xuất text từ CV URL, sử dụng pdfplumber"""
+    """Trích xuất text từ CV URL, sử dụng pypdfium2/PyMuPDF/pdfplumber (có cache TTL trong process + Redis)"""
     if not url:
         return None
     
-    # Sử dụng pdfplumber
-    pdf_text = extract_text_from_pdf(url)
-    if pdf_text:
-        return pdf_text
+    def load():
+        # Sử dụng pypdfium2/PyMuPDF/pdfplumber
+        pdf_text = extract_text_from_pdf(url)
+        if pdf_text:
+            return pdf_text
+        return None
     
-    return None
+    # Cache trong process trước Redis (một lớp Redis duy nhất theo URL, namespace riêng 'cv:' cho dữ liệu CV/PII);
+    # _get_cached single-flight theo URL nên các CV khác nhau vẫn tải song song
+    return _get_cached(
+        'cv_texts', url, lambda: _shared_cached(f"cv:{_hash_key(url)}:v1", CV_CACHE_TTL, load)
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_sklearn():
+    """Import sklearn ở lần dùng đầu tiên thay vì lúc khởi động (giảm RSS/cold start)"""
+    from sklearn.feature_extraction import text as sklearn_text
+    return sklearn_text
+
+@lru_cache(maxsize=1)
+def _default_word_analyzer():
+    """Analyzer mặc định của TfidfVectorizer (lowercase + token_pattern word)"""
+    return _load_sklearn().TfidfVectorizer().build_analyzer()
+
+@lru_cache(maxsize=1)
+def _char_ngram_analyzer():
+    """Analyzer char_wb 3-4 gram, bỏ dấu tiếng Việt: hợp với tên ngắn, từ vựng nhỏ hơn word n-gram"""
+    # normalize_name thay cho lowercase/strip_accents: strip_accents không đổi "đ" thành "d"
+    return _load_sklearn().TfidfVectorizer(
+        analyzer='char_wb', ngram_range=(3, 4), preprocessor=normalize_name
+    ).build_analyzer()
+
+@lru_cache(maxsize=10000)
+def _analyze_text(text):
+    """Tách token có memo: tên/job title lặp lại giữa các lần fit không phải tokenize lại"""
+    return tuple(_default_word_analyzer()(text))
+
+@lru_cache(maxsize=10000)
+def _analyze_name(text):
+    """Tách char n-gram có memo cho tên opening/ứng viên/stage"""
+    return tuple(_char_ngram_analyzer()(text))
+
+def new_tfidf_vectorizer(char_ngrams=False):
+    """Tạo TfidfVectorizer float32 dùng analyzer có memo (word, hoặc char n-gram cho tên ngắn; sklearn được import lazy)"""
+    analyzer = _analyze_name if char_ngrams else _analyze_text
+    return _load_sklearn().TfidfVectorizer(dtype=np.float32, analyzer=analyzer)
+
+@lru_cache(maxsize=1)
+def hashing_vectorizer():
+    """HashingVectorizer dùng chung (stateless, không cần fit): vector đã chuẩn hóa L2 nên cosine = tích vô hướng"""
+    return _load_sklearn().HashingVectorizer(
+        n_features=2 ** 18, alternate_sign=False, norm='l2', dtype=np.float32
+    )
+
+@lru_cache(maxsize=128)
+def _fit_name_vectors(names, char_ngrams=False):
+    """Fit TF-IDF một lần cho danh sách tên (tuple: opening, ứng viên, stage) và tái sử dụng, chỉ cần transform query cho mỗi lần tìm"""
+    vectorizer = new_tfidf_vectorizer(char_ngrams)
+    name_vectors = vectorizer.fit_transform(names)
+    # Ma trận nhỏ: chuyển sẵn sang dense float32 C-contiguous một lần (được cache cùng vectorizer)
+    # để mỗi lần tìm chỉ là một phép GEMV qua BLAS
+    if name_vectors.shape[0] * name_vectors.shape[1] <= DENSE_GEMV_MAX_CELLS:
+        name_vectors = np.ascontiguousarray(name_vectors.toarray(), dtype=np.float32)
+    return vectorizer, name_vectors
+
+# Ma trận TF-IDF đã fit có số ô <= ngưỡng này được giữ dạng dense (BLAS sgemv nhanh hơn CSR dot)
+DENSE_GEMV_MAX_CELLS = 1_000_000
 
+def _cosine_scores(query_vector, matrix):
+    """Cosine similarity giữa 1 query vector và các dòng của ma trận TF-IDF, trả về mảng 1 chiều"""
+    if isinstance(matrix, np.ndarray):
+        # Ma trận dense đã chuẩn hóa L2 (từ _fit_name_vectors): cosine = GEMV qua BLAS
+        return matrix @ query_vector.toarray().ravel().astype(np.float32)
+    # TfidfVectorizer/HashingVectorizer đều chuẩn hóa norm='l2' nên cosine chính là tích vô hướng sparse
+    return np.asarray((matrix @ query_vector.T).todense()).ravel()
 
-def find_opening_id_by_name(query_name, api_key, similarity_threshold=0.5):
+@lru_cache(maxsize=10000)
+def normalize_name(text):
+    """casefold + bỏ dấu tiếng Việt (đ -> d) để so khớp tên không phân biệt hoa thường/dấu (có cache)"""
+    text = unicodedata.normalize('NFD', text.casefold().replace('đ', 'd'))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+def match_thresholds(rapidfuzz_available):
+    """Ngưỡng similarity (tên người, job title, stage) theo thang của scorer đang dùng
+    
+    RapidFuzz: vd "Offered"/"Hired" = 0.50, "nguyen van an"/"nguyen van binh" = 0.86.
+    Fallback TF-IDF char_wb 3-4 gram cho điểm cao với tên chung nhiều n-gram nên cũng phải chặt:
+    "Data Engineer"/"Backend Engineer" = 0.60, "DevOps Engineer"/"Data Engineer" = 0.76,
+    "Nguyễn Văn"/"Nguyễn Văn An" = 0.92, còn "Hire"/"Hired" = 0.80 (RapidFuzz cũng chấp nhận).
+    """
+    if rapidfuzz_available:
+        return 0.95, 0.9, 0.8
+    return 0.95, 0.85, 0.75
+
+NAME_MATCH_THRESHOLD, TITLE_MATCH_THRESHOLD, STAGE_MATCH_THRESHOLD = match_thresholds(RAPIDFUZZ_AVAILABLE)
+
+def best_name_match(query, names, normalized_names=None, person_names=False):
+    """Tìm tên gần nhất với query: RapidFuzz nếu có, fallback TF-IDF cosine. Trả về (index, similarity 0-1)
+    
+    normalized_names: names đã qua normalize_name (dựng sẵn lúc nạp cache) để không chuẩn hóa lại mỗi lần tìm.
+    person_names: tên người dùng token_sort_ratio (một phần của tên không được tính là khớp hoàn toàn),
+    còn lại (opening/stage/bài test) dùng WRatio.
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        if normalized_names is None:
+            normalized_names = [normalize_name(name) for name in names]
+        scorer = fuzz.token_sort_ratio if person_names else fuzz.WRatio
+        _, score, best_idx = fuzz_process.extractOne(normalize_name(query), normalized_names, scorer=scorer)
+        return best_idx, score / 100.0
+    vectorizer, name_vectors = _fit_name_vectors(tuple(names), char_ngrams=True)
+    similarities = _cosine_scores(vectorizer.transform([query]), name_vectors)
+    best_idx = int(np.argmax(similarities))
+    return best_idx, float(similarities[best_idx])
+
+def best_text_match(query, texts, text_vectors=None):
+    """Như best_name_match nhưng fallback HashingVectorizer (không fit) cho tập text thay đổi theo từng lần gọi"""
+    if RAPIDFUZZ_AVAILABLE:
+        return best_name_match(query, texts)
+    vectorizer = hashing_vectorizer()
+    if text_vectors is None:
+        text_vectors = vectorizer.transform(texts)
+    similarities = _cosine_scores(vectorizer.transform([query]), text_vectors)
+    best_idx = int(np.argmax(similarities))
+    return best_idx, float(similarities[best_idx])
+
+def find_opening_id_by_name(query_name, api_key, similarity_threshold=TITLE_MATCH_THRESHOLD):
     """Tìm opening_id gần nhất với query_name bằng cosine similarity"""
-    openings = get_base_openings(api_key, use_cache=True)
+    # Index dựng một lần cho mỗi snapshot openings (tuple tên dùng lại được cho cache fit TF-IDF)
+    openings_index = get_openings_index(api_key, use_cache=True)
+    openings = openings_index['openings']
     
     if not openings:
         return None, None, 0.0
     
-    # Nếu tìm thấy chính xác theo id hoặc name
-    exact_match = next((op for op in openings if op['id'] == query_name or op['name'] == query_name), None)
+    # Nếu tìm thấy chính xác theo id hoặc name (tra dict thay vì duyệt danh sách)
+    exact_match = openings_index['by_key'].get(query_name)
     if exact_match:
         return exact_match['id'], exact_match['name'], 1.0
     
     # Nếu không tìm thấy chính xác, dùng cosine similarity
-    opening_names = [op['name'] for op in openings]
-    
-    if not opening_names:
-        return None, None, 0.0
+    opening_names = openings_index['names']
     
-    # Vectorize các tên opening
-    vectorizer = TfidfVectorizer()
+    # Tìm tên opening gần nhất (RapidFuzz, fallback TF-IDF cosine)
     try:
-        name_vectors = vectorizer.fit_transform(opening_names)
-        query_vector = vectorizer.transform([query_name])
-        
-        # Tính cosine similarity
-        similarities = cosine_similarity(query_vector, name_vectors).flatten()
-        
-        # Tìm index có similarity cao nhất
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
+        best_idx, best_similarity = best_name_match(
+            query_name, opening_names, openings_index['normalized_names']
+        )
         
         # Nếu similarity >= threshold, trả về opening đó
         if best_similarity >= similarity_threshold:
             best_opening = openings[best_idx]
-            return best_opening['id'], best_opening['name'], float(best_similarity)
+            return best_opening['id'], best_opening['name'], best_similarity
         else:
-            return None, None, float(best_similarity)
+            return None, None, best_similarity
     except Exception:
         # Nếu có lỗi trong vectorization, trả về None
         return None, None, 0.0
 
-def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, similarity_threshold=0.5, filter_stages=None):
+def require_opening(opening_name_or_id, api_key):
+    """Tìm opening bằng find_opening_id_by_name, raise 404 (kèm similarity cao nhất) nếu không có opening phù hợp"""
+    opening_id, matched_name, similarity_score = find_opening_id_by_name(opening_name_or_id, api_key)
+    if not opening_id:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'. Similarity score cao nhất: {similarity_score:.2f}"
+        )
+    return opening_id, matched_name, similarity_score
+
+def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, similarity_threshold=NAME_MATCH_THRESHOLD, filter_stages=None):
     """Tìm candidate_id dựa trên tên ứng viên trong một opening cụ thể bằng cosine similarity.
     
     Args:
         candidate_name: Tên ứng viên cần tìm
         opening_id: ID của opening
         api_key: API key để gọi Base API
-        similarity_threshold: Ngưỡng similarity tối thiểu (mặc định 0.5)
+        similarity_threshold: Ngưỡng similarity tối thiểu (mặc định NAME_MATCH_THRESHOLD)
         filter_stages: Danh sách stage names để lọc. 
                       - None = không lọc stage, tìm trong tất cả stage (dùng cho /api/candidate)
                       - ['Offered', 'Hired'] = chỉ tìm trong stage "Offered" và "Hired" (chỉ dùng cho /api/offer-letter)
@@ -471,57 +1138,44 @@ def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, simil
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         return None, 0.0
     
-    data = response.json()
+    data = _json_loads(response.content)
     if 'candidates' not in data or not data['candidates']:
         return None, 0.0
     
     # Lọc theo stage nếu có filter_stages (chỉ dùng cho endpoint /api/offer-letter)
     # Endpoint /api/candidate luôn truyền filter_stages=None để tìm trong tất cả stage
-    if filter_stages:
-        filtered_candidates = []
-        for candidate in data['candidates']:
-            stage_name = candidate.get('stage_name', '')
-            if stage_name and stage_name in filter_stages:
-                filtered_candidates.append(candidate)
-        
-        if not filtered_candidates:
-            return None, 0.0
-    else:
-        # Không lọc stage, lấy tất cả candidates
-        filtered_candidates = data['candidates']
-    
-    # Tìm candidate bằng tên với cosine similarity trong danh sách đã lọc
-    candidate_names = [c.get('name', '') for c in filtered_candidates if c.get('name')]
+    allowed_stages = frozenset(filter_stages) if filter_stages else None
+    
+    # Một lượt duyệt: lọc stage, kiểm tra exact match và dựng danh sách tên song song với candidate
+    candidates_with_names = []
+    candidate_names = []
+    for candidate in data['candidates']:
+        if allowed_stages is not None and candidate.get('stage_name', '') not in allowed_stages:
+            continue
+        name = candidate.get('name')
+        if not name:
+            continue
+        # Kiểm tra exact match trước
+        if name == candidate_name:
+            return candidate.get('id'), 1.0
+        candidates_with_names.append(candidate)
+        candidate_names.append(name)
     
     if not candidate_names:
         return None, 0.0
     
-    # Kiểm tra exact match trước
-    exact_match = next((c for c in filtered_candidates if c.get('name') == candidate_name), None)
-    if exact_match:
-        return exact_match.get('id'), 1.0
-    
-    # Dùng cosine similarity để tìm candidate name gần nhất
+    # Tìm candidate name gần nhất (RapidFuzz, fallback TF-IDF cosine)
     try:
-        vectorizer = TfidfVectorizer()
-        name_vectors = vectorizer.fit_transform(candidate_names)
-        query_vector = vectorizer.transform([candidate_name])
-        
-        similarities = cosine_similarity(query_vector, name_vectors).flatten()
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
+        best_idx, best_similarity = best_name_match(candidate_name, candidate_names, person_names=True)
         
         # Nếu similarity >= threshold, trả về candidate đó
         if best_similarity >= similarity_threshold:
-            candidates_with_names = [c for c in filtered_candidates if c.get('name')]
-            if best_idx < len(candidates_with_names):
-                best_candidate = candidates_with_names[best_idx]
-                return best_candidate.get('id'), float(best_similarity)
+            return candidates_with_names[best_idx].get('id'), float(best_similarity)
         
         return None, float(best_similarity)
     except Exception:
@@ -544,22 +1198,23 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API khi lấy ứng viên: {e}")
 
-    data = response.json()
+    data = _json_loads(response.content)
     if 'candidates' in data and data['candidates']:
         # Nếu có stage_name, tìm các stage name phù hợp bằng cosine similarity
         matching_stage_names = None
         if stage_name is not None:
             # Thu thập tất cả stage_name unique từ candidates
-            all_stage_names = list(set([
-                candidate.get('stage_name', '') 
-                for candidate in data['candidates'] 
+            # (sắp xếp để danh sách ổn định -> trúng cache TF-IDF theo tuple tên)
+            all_stage_names = sorted({
+                candidate['stage_name']
+                for candidate in data['candidates']
                 if candidate.get('stage_name')
-            ]))
+            })
             
             if not all_stage_names:
                 # Nếu không có stage_name nào, lấy tất cả
@@ -567,21 +1222,15 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
             else:
                 # Kiểm tra exact match trước
                 if stage_name in all_stage_names:
-                    matching_stage_names = [stage_name]
+                    matching_stage_names = frozenset((stage_name,))
                 else:
-                    # Dùng cosine similarity để tìm stage name gần nhất
+                    # Tìm stage name gần nhất (RapidFuzz, fallback TF-IDF cosine)
                     try:
-                        vectorizer = TfidfVectorizer()
-                        stage_vectors = vectorizer.fit_transform(all_stage_names)
-                        query_vector = vectorizer.transform([stage_name])
-                        
-                        similarities = cosine_similarity(query_vector, stage_vectors).flatten()
-                        best_idx = np.argmax(similarities)
-                        best_similarity = similarities[best_idx]
+                        best_idx, best_similarity = best_name_match(stage_name, all_stage_names)
                         
-                        # Nếu similarity >= 0.3, lấy stage name đó (ngưỡng thấp để bao quát hơn)
-                        if best_similarity >= 0.3:
-                            matching_stage_names = [all_stage_names[best_idx]]
+                        # Nếu similarity >= STAGE_MATCH_THRESHOLD, lấy stage name đó
+                        if best_similarity >= STAGE_MATCH_THRESHOLD:
+                            matching_stage_names = frozenset((all_stage_names[best_idx],))
                         else:
                             # Nếu không tìm thấy gì phù hợp, lấy tất cả
                             matching_stage_names = None
@@ -590,29 +1239,50 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
                         matching_stage_names = None
         
         # Bước 1: Lọc ứng viên theo stage_name trước (chưa trích xuất cv_text để tiết kiệm request)
-        filtered_candidates = []
-        for candidate in data['candidates']:
-            # Lọc theo stage_name nếu có matching_stage_names
-            if matching_stage_names is not None:
-                candidate_stage_name = candidate.get('stage_name', '')
-                if candidate_stage_name not in matching_stage_names:
-                    continue
-            
-            filtered_candidates.append(candidate)
+        def iter_matching(raw_candidates):
+            for candidate in raw_candidates:
+                # Lọc theo stage_name nếu có matching_stage_names
+                if matching_stage_names is None or candidate.get('stage_name', '') in matching_stage_names:
+                    yield candidate
+        
+        filtered_candidates = list(iter_matching(data.pop('candidates')))
+        # Bỏ payload gốc: ứng viên bị lọc ra được giải phóng trong lúc tải/parse CV
+        data = None
+        
+        # Bước 2: Trích xuất cv_text và bài test chỉ cho các ứng viên đã được lọc
+        # (chạy song song: mỗi CV URL tải/parse một lần, mỗi ứng viên một lượt đọc Google Sheet)
+        def first_cv_url(candidate):
+            cv_urls = candidate.get('cvs', [])
+            return cv_urls[0] if isinstance(cv_urls, list) and len(cv_urls) > 0 else None
+        
+        unique_cv_urls = list(dict.fromkeys(url for url in map(first_cv_url, filtered_candidates) if url))
+        # Bài test: đọc cả sheet một lần (có cache); nếu lỗi thì quay về đọc theo từng ứng viên
+        test_results_by_id = (
+            get_test_results_batch(candidate.get('id') for candidate in filtered_candidates)
+            if filtered_candidates else None
+        )
+        cv_futures = {}
+        test_futures = {}
+        if filtered_candidates:
+            per_candidate_tests = filtered_candidates if test_results_by_id is None else []
+            workers = min(CV_PREFETCH_WORKERS, len(unique_cv_urls) + len(per_candidate_tests)) or 1
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                cv_futures = {url: executor.submit(extract_text_from_cv_url, url) for url in unique_cv_urls}
+                test_futures = {
+                    candidate.get('id'): executor.submit(get_test_results_from_google_sheet, candidate.get('id'))
+                    for candidate in per_candidate_tests
+                }
+        
+        # Lấy thông tin users một lần cho cả danh sách ứng viên
+        username_to_info = get_users_info(use_cache=True)
         
-        # Bước 2: Trích xuất cv_text chỉ cho các ứng viên đã được lọc
         candidates = []
         for candidate in filtered_candidates:
-            cv_urls = candidate.get('cvs', [])
-            cv_url = cv_urls[0] if isinstance(cv_urls, list) and len(cv_urls) > 0 else None
-            
-            # Chỉ trích xuất cv_text từ CV URL sau khi đã lọc xong (tiết kiệm request Gemini)
-            cv_text = None
-            if cv_url:
-                cv_text = extract_text_from_cv_url(cv_url)
+            cv_url = first_cv_url(candidate)
+            cv_text = cv_futures[cv_url].result() if cv_url else None
             
             # Xử lý evaluations để lấy reviews chi tiết
-            reviews = process_evaluations(candidate.get('evaluations', []))
+            reviews = process_evaluations(candidate.get('evaluations', []), username_to_info)
             # Giữ lại review cũ (text đơn giản) để tương thích ngược
             review = extract_message(candidate.get('evaluations', []))
             
@@ -623,7 +1293,10 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
                         form_data[item['id']] = item['value']
             
             # Lấy dữ liệu bài test từ Google Sheet
-            test_results = get_test_results_from_google_sheet(candidate.get('id'))
+            if test_results_by_id is not None:
+                test_results = test_results_by_id.get(str(candidate.get('id')))
+            else:
+                test_results = test_futures[candidate.get('id')].result()
             
             candidate_info = {
                 "id": candidate.get('id'),
@@ -647,6 +1320,11 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
         return candidates
     return []
 
+def _hcm_day_start_ts(day, days=0):
+    """Epoch (giây) của 00:00 ngày `day` + `days` ngày theo giờ Asia/Ho_Chi_Minh"""
+    day = day + timedelta(days=days)
+    return int(HCM_TZ.localize(datetime(day.year, day.month, day.day)).timestamp())
+
 def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, filter_date=None):
     """Truy xuất lịch phỏng vấn từ Base API, chỉ trả về các trường quan trọng. Lọc dựa trên date của time_dt."""
     url = "https://hiring.base.vn/publicapi/v2/interview/list"
@@ -660,12 +1338,12 @@ def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, fil
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API khi lấy lịch phỏng vấn: {e}")
 
-    data = response.json()
+    data = _json_loads(response.content)
     if 'interviews' in data and data['interviews']:
         interviews = data['interviews']
         
@@ -678,52 +1356,61 @@ def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, fil
         
         # Xử lý và chỉ lấy các trường quan trọng
         processed_interviews = []
-        hcm_tz = timezone('Asia/Ho_Chi_Minh')
-        
         # Chuyển đổi start_date và end_date thành date objects nếu có
         start_date_obj = None
         end_date_obj = None
         if start_date:
-            start_date_obj = start_date if isinstance(start_date, date) else datetime.strptime(start_date, "%Y-%m-%d").date()
+            start_date_obj = start_date if isinstance(start_date, date) else parse_iso_date(start_date)
         if end_date:
-            end_date_obj = end_date if isinstance(end_date, date) else datetime.strptime(end_date, "%Y-%m-%d").date()
+            end_date_obj = end_date if isinstance(end_date, date) else parse_iso_date(end_date)
+        
+        # Đổi khoảng ngày lọc (theo giờ Asia/Ho_Chi_Minh) thành khoảng epoch [lower_ts, upper_ts) một lần:
+        # mỗi interview chỉ cần so sánh số nguyên, datetime chỉ được tạo cho interview được giữ lại
+        # filter_date được ưu tiên cao nhất, sau đó mới đến start_date và end_date
+        has_date_filter = bool(filter_date or start_date_obj or end_date_obj)
+        lower_ts = upper_ts = None
+        if filter_date:
+            lower_ts, upper_ts = _hcm_day_start_ts(filter_date), _hcm_day_start_ts(filter_date, days=1)
+        else:
+            if start_date_obj:
+                lower_ts = _hcm_day_start_ts(start_date_obj)
+            if end_date_obj:
+                upper_ts = _hcm_day_start_ts(end_date_obj, days=1)
         
         for interview in interviews:
-            # Chỉ lấy các trường quan trọng
-            processed_interview = {
-                'id': interview.get('id'),
-                'candidate_id': interview.get('candidate_id'),
-                'candidate_name': interview.get('candidate_name'),
-                'opening_name': interview.get('opening_name'),
-                'time_dt': None
-            }
-            
-            # Chuyển đổi timestamp 'time' sang datetime với timezone Asia/Ho_Chi_Minh
-            time_dt_date = None
-            if 'time' in interview and interview.get('time'):
+            timestamp = None
+            if interview.get('time'):
                 try:
                     timestamp = int(interview['time'])
-                    dt = datetime.fromtimestamp(timestamp, tz=timezone('UTC'))
-                    dt_hcm = dt.astimezone(hcm_tz)
-                    processed_interview['time_dt'] = dt_hcm.isoformat()
-                    time_dt_date = dt_hcm.date()  # Lấy date để lọc
-                except (ValueError, TypeError, OSError):
+                except (ValueError, TypeError):
                     pass
             
-            # Lọc dựa trên date của time_dt với filter_date (ưu tiên cao nhất)
-            if filter_date:
-                if time_dt_date is None or time_dt_date != filter_date:
-                    continue  # Bỏ qua nếu không có time_dt hoặc date không khớp
-            # Lọc dựa trên start_date và end_date của time_dt
-            elif start_date_obj or end_date_obj:
-                if time_dt_date is None:
+            if has_date_filter:
+                if timestamp is None:
                     continue  # Bỏ qua nếu không có time_dt
-                if start_date_obj and time_dt_date < start_date_obj:
-                    continue  # Bỏ qua nếu trước start_date
-                if end_date_obj and time_dt_date > end_date_obj:
-                    continue  # Bỏ qua nếu sau end_date
+                if lower_ts is not None and timestamp < lower_ts:
+                    continue  # Bỏ qua nếu trước ngày bắt đầu
+                if upper_ts is not None and timestamp >= upper_ts:
+                    continue  # Bỏ qua nếu sau ngày kết thúc
             
-            processed_interviews.append(processed_interview)
+            # Chuyển đổi timestamp 'time' sang datetime với timezone Asia/Ho_Chi_Minh
+            # (fromtimestamp nhận thẳng tz, không cần đi qua UTC rồi astimezone)
+            dt_hcm = None
+            if timestamp is not None:
+                try:
+                    dt_hcm = datetime.fromtimestamp(timestamp, HCM_TZ)
+                except (ValueError, OSError, OverflowError):
+                    if has_date_filter:
+                        continue
+            
+            # Chỉ lấy các trường quan trọng (chỉ format isoformat cho interview được giữ lại)
+            processed_interviews.append({
+                'id': interview.get('id'),
+                'candidate_id': interview.get('candidate_id'),
+                'candidate_name': interview.get('candidate_name'),
+                'opening_name': interview.get('opening_name'),
+                'time_dt': dt_hcm.isoformat() if dt_hcm is not None else None
+            })
         
         return processed_interviews
     
@@ -742,10 +1429,10 @@ def get_opening_stages(opening_id, api_key):
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
         
-        result = response.json()
+        result = _json_loads(response.content)
         
         # Trích xuất danh sách stages từ opening.stats.stages
         stages_list = result.get('opening', {}).get('stats', {}).get('stages', [])
@@ -770,67 +1457,36 @@ def get_feedback_data_from_google_sheet(start_date=None, job_description=None):
         return None
     
     try:
-        payload = {
-            'action': 'read_data'
-        }
+        # Dùng chung bản đọc toàn bộ sheet (cache TTL, request đồng thời gộp một lượt POST) với tra cứu bài test:
+        # mọi tổ hợp (start_date, job_description) chỉ lọc lại trên cùng một bản dữ liệu
+        all_data = get_all_test_results_from_google_sheet()
         
-        response = requests.post(
-            GOOGLE_SHEET_SCRIPT_URL,
-            json=payload,
-            timeout=15
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        
-        if not result.get('success') or not result.get('data'):
+        if not all_data:
             return None
         
-        all_data = result.get('data', [])
-        
-        # Lọc chỉ lấy các bài test có tên chứa 'feedback'
-        feedback_data = [
-            item for item in all_data 
-            if 'Tên bài test' in item and 'feedback' in item.get('Tên bài test', '').lower()
-        ]
-        
-        if not feedback_data:
-            return None
-            
-        # --- Xử lý lọc theo start_date ---
+        # Ngày bắt đầu lọc (dựa trên cột 'Time'); start_date sai định dạng thì bỏ qua lọc ngày
+        filter_date = None
         if start_date:
             try:
-                filter_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-                filtered_by_date = []
-                
-                for item in feedback_data:
-                    time_str = item.get('Time', '')
-                    if not time_str:
-                        continue
-                        
-                    item_date = None
-                    # Thử parse các định dạng ngày tháng phổ biến
-                    date_formats = [
-                        "%d/%m/%Y %H:%M:%S", "%d/%m/%Y", 
-                        "%Y-%m-%d %H:%M:%S", "%Y-%m-%d",
-                        "%m/%d/%Y %H:%M:%S", "%m/%d/%Y"
-                    ]
-                    
-                    for fmt in date_formats:
-                        try:
-                            item_date = datetime.strptime(time_str, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if item_date and item_date >= filter_date:
-                        filtered_by_date.append(item)
-                
-                feedback_data = filtered_by_date
+                filter_date = parse_iso_date(start_date)
             except ValueError:
-                # Nếu start_date không đúng định dạng, bỏ qua lọc ngày
                 pass
         
+        # Một lượt duyệt: chỉ lấy bài test có tên chứa 'feedback' và (nếu có) Time >= start_date
+        # (parse_sheet_date có cache nên các giá trị Time trùng nhau chỉ parse một lần)
+        feedback_data = []
+        for item in all_data:
+            if 'Tên bài test' not in item or 'feedback' not in item.get('Tên bài test', '').lower():
+                continue
+            if filter_date is not None:
+                time_str = item.get('Time', '')
+                if not time_str:
+                    continue
+                item_date = parse_sheet_date(time_str)
+                if not item_date or item_date < filter_date:
+                    continue
+            feedback_data.append(item)
+        
         # --- Xử lý lọc theo job_description (cosine similarity) ---
         if job_description and feedback_data:
             job_titles = [item.get('Công việc ứng tuyển', '') for item in feedback_data]
@@ -838,24 +1494,21 @@ def get_feedback_data_from_google_sheet(start_date=None, job_description=None):
             # Nếu có ít nhất 1 job title để so sánh
             if any(job_titles):
                 try:
-                    vectorizer = TfidfVectorizer()
-                    # Thêm job_description vào danh sách để fit
-                    all_docs = job_titles + [job_description]
-                    tfidf_matrix = vectorizer.fit_transform(all_docs)
-                    
-                    # Vector của job_description là phần tử cuối cùng
-                    query_vector = tfidf_matrix[-1]
-                    # Vectors của các job titles trong data
-                    doc_vectors = tfidf_matrix[:-1]
+                    # Fit một lần cho tập job title (cache theo tuple, sheet ít thay đổi), chỉ transform job_description
+                    unique_titles = sorted(set(job_titles))
+                    vectorizer, doc_vectors = _fit_name_vectors(tuple(unique_titles))
+                    query_vector = vectorizer.transform([job_description])
                     
-                    # Tính cosine similarity
-                    similarities = cosine_similarity(query_vector, doc_vectors).flatten()
+                    # Tính cosine similarity cho từng job title (không trùng lặp)
+                    similarities = _cosine_scores(query_vector, doc_vectors)
+                    # So ngưỡng (0.3) một lần trên mảng NumPy, giữ lại tập job title đạt ngưỡng
+                    matched_titles = {unique_titles[i] for i in np.flatnonzero(similarities >= 0.3)}
                     
-                    # Lọc các item có similarity >= ngưỡng (ví dụ 0.3)
-                    filtered_by_job = []
-                    for idx, score in enumerate(similarities):
-                        if score >= 0.3:  # Ngưỡng tương đồng
-                            filtered_by_job.append(feedback_data[idx])
+                    # Lọc các item có job title đạt ngưỡng tương đồng
+                    filtered_by_job = [
+                        item for item, title in zip(feedback_data, job_titles)
+                        if title in matched_titles
+                    ]
                     
                     feedback_data = filtered_by_job
                 except Exception:
@@ -866,10 +1519,8 @@ def get_feedback_data_from_google_sheet(start_date=None, job_description=None):
             return None
         
         # Parse feedback content
-        import re
-        
         # Dictionary để lưu kết quả theo format: {'câu hỏi': {'tên ứng viên': 'câu trả lời'}}
-        feedback_result = {}
+        feedback_result = defaultdict(dict)
         
         for item in feedback_data:
             candidate_name = item.get('Tên ứng viên', 'Unknown')
@@ -878,58 +1529,85 @@ def get_feedback_data_from_google_sheet(start_date=None, job_description=None):
             if not test_content:
                 continue
             
-            # Regex để tìm tất cả câu hỏi và câu trả lời
-            pattern = r"Câu hỏi (\d+)\.(.*?)\nCâu trả lời của thí sinh\s*(.*?)\s*Đây là câu hỏi mở"
-            matches = re.findall(pattern, test_content, re.DOTALL)
-            
-            for match in matches:
-                q_num = match[0]
-                q_text = match[1].strip()
-                answer = match[2].strip()
-                
+            # Regex để tìm tất cả câu hỏi và câu trả lời (nhóm 1 là số thứ tự câu hỏi, không dùng)
+            for _, q_text, answer in _TEST_QA_RE.findall(test_content):
                 # Clean up question text (remove newlines, extra spaces)
-                q_text = re.sub(r'\s+', ' ', q_text)
-                
-                # Nếu câu hỏi chưa có trong dictionary, tạo mới
-                if q_text not in feedback_result:
-                    feedback_result[q_text] = {}
+                q_text = _WS_RE.sub(' ', q_text.strip())
                 
-                # Thêm câu trả lời của ứng viên vào câu hỏi
-                feedback_result[q_text][candidate_name] = answer
+                # Thêm câu trả lời của ứng viên vào câu hỏi (câu hỏi mới tự tạo dict rỗng)
+                feedback_result[q_text][candidate_name] = answer.strip()
         
-        return feedback_result if feedback_result else None
+        return dict(feedback_result) if feedback_result else None
         
     except Exception as e:
         # Nếu có lỗi, trả về None
         return None
 
-def get_all_test_results_from_google_sheet():
-    """Lấy tất cả dữ liệu bài test từ Google Sheet"""
+def get_all_test_results_from_google_sheet(use_cache=True):
+    """Lấy tất cả dữ liệu bài test từ Google Sheet (có cache TTL, request đồng thời dùng chung một lượt POST)"""
     if not GOOGLE_SHEET_SCRIPT_URL:
         return None
     
-    try:
-        payload = {
-            'action': 'read_data',
-            'filters': {}
-        }
-        
-        response = requests.post(
-            GOOGLE_SHEET_SCRIPT_URL,
-            json=payload,
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        
-        if result.get('success') and result.get('data'):
-            return result.get('data', [])
-        
-        return []
-    except Exception as e:
-        # Nếu có lỗi, trả về None (không làm gián đoạn flow chính)
+    def load():
+        try:
+            payload = {
+                'action': 'read_data',
+                'filters': {}
+            }
+            
+            response = _SESSION.post(
+                GOOGLE_SHEET_SCRIPT_URL,
+                json=payload,
+                timeout=30
+            )
+            response.raise_for_status()
+            
+            result = _json_loads(response.content)
+            
+            if result.get('success') and result.get('data'):
+                return result.get('data', [])
+            
+            return []
+        except Exception as e:
+            # Nếu có lỗi, trả về None (không làm gián đoạn flow chính, không lưu cache)
+            return None
+    
+    return _get_cached('sheet_data', GOOGLE_SHEET_SCRIPT_URL, load, use_cache)
+
+def format_test_result(item):
+    """Chuyển một dòng Google Sheet thành dict bài test"""
+    return {
+        'test_name': item.get('Tên bài test', ''),
+        'score': item.get('Score', ''),
+        'time': item.get('Time', ''),
+        'link': item.get('Link', ''),
+        'test_content': item.get('test content', '')
+    }
+
+def get_test_results_bulk(use_cache=True):
+    """Đọc toàn bộ bài test một lần và nhóm theo candidate_id (có cache), None nếu không đọc được"""
+    if not GOOGLE_SHEET_SCRIPT_URL:
         return None
+    
+    def load():
+        all_data = get_all_test_results_from_google_sheet(use_cache)
+        if all_data is None:
+            return None
+        results_by_id = {}
+        for item in all_data:
+            candidate_id = str(item.get('candidate_id', ''))
+            if candidate_id:
+                results_by_id.setdefault(candidate_id, []).append(format_test_result(item))
+        return results_by_id
+    
+    return _get_cached('test_results', GOOGLE_SHEET_SCRIPT_URL, load, use_cache)
+
+def get_test_results_batch(candidate_ids, use_cache=True):
+    """Lấy bài test của nhiều ứng viên trong một lượt đọc Google Sheet: candidate_id -> danh sách bài test hoặc None"""
+    results_by_id = get_test_results_bulk(use_cache)
+    if results_by_id is None:
+        return None
+    return {str(candidate_id): results_by_id.get(str(candidate_id)) or None for candidate_id in candidate_ids}
 
 def get_test_results_from_google_sheet(candidate_id):
     """Lấy dữ liệu bài test của ứng viên từ Google Sheet theo candidate_id"""
@@ -944,27 +1622,18 @@ def get_test_results_from_google_sheet(candidate_id):
             }
         }
         
-        response = requests.post(
+        response = _SESSION.post(
             GOOGLE_SHEET_SCRIPT_URL,
             json=payload,
             timeout=10
         )
         response.raise_for_status()
         
-        result = response.json()
+        result = _json_loads(response.content)
         
         if result.get('success') and result.get('data'):
             # Trả về danh sách bài test của ứng viên
-            test_results = []
-            for item in result.get('data', []):
-                test_result = {
-                    'test_name': item.get('Tên bài test', ''),
-                    'score': item.get('Score', ''),
-                    'time': item.get('Time', ''),
-                    'link': item.get('Link', ''),
-                    'test_content': item.get('test content', '')
-                }
-                test_results.append(test_result)
+            test_results = [format_test_result(item) for item in result.get('data', [])]
             return test_results if test_results else None
         
         return None
@@ -972,75 +1641,81 @@ def get_test_results_from_google_sheet(candidate_id):
         # Nếu có lỗi, trả về None (không làm gián đoạn flow chính)
         return None
 
-def find_candidate_id_in_google_sheet(candidate_name, opening_name, similarity_threshold=0.5):
-    """Tìm candidate_id trong Google Sheet bằng cosine similarity với tên ứng viên và vị trí ứng tuyển"""
-    if not GOOGLE_SHEET_SCRIPT_URL or not candidate_name or not opening_name:
-        return None, 0.0, 0.0
+def get_sheet_candidate_index(use_cache=True):
+    """Dựng index ứng viên từ Google Sheet một lần (có cache): candidate_id, vị trí, exact index và index theo tên đã chuẩn hóa"""
+    if not GOOGLE_SHEET_SCRIPT_URL:
+        return None
     
-    # Lấy tất cả dữ liệu từ Google Sheet
-    all_data = get_all_test_results_from_google_sheet()
+    def load():
+        all_data = get_all_test_results_from_google_sheet(use_cache)
+        if not all_data or not isinstance(all_data, list):
+            return None
+        
+        # Một lượt duyệt: danh sách song song (candidate_id, vị trí) theo thứ tự xuất hiện đầu tiên,
+        # đồng thời index (tên, vị trí) -> candidate_id để kiểm tra exact match O(1)
+        # và tên đã chuẩn hóa -> các dòng có tên đó
+        candidate_ids = []
+        openings = []
+        exact_index = {}
+        rows_by_name = {}
+        seen_ids = set()
+        for item in all_data:
+            candidate_id = str(item.get('candidate_id', ''))
+            if candidate_id and candidate_id not in seen_ids:
+                seen_ids.add(candidate_id)
+                name = item.get('Tên ứng viên', '')
+                opening = item.get('Công việc ứng tuyển', '')
+                rows_by_name.setdefault(normalize_name(name), []).append(len(candidate_ids))
+                candidate_ids.append(candidate_id)
+                openings.append(opening)
+                exact_index.setdefault((name, opening), candidate_id)
+        
+        if not candidate_ids:
+            return None
+        
+        return {
+            'candidate_ids': candidate_ids,
+            'openings': openings,
+            'exact_index': exact_index,
+            'rows_by_name': rows_by_name
+        }
     
-    if not all_data or not isinstance(all_data, list):
+    return _get_cached('sheet_index', GOOGLE_SHEET_SCRIPT_URL, load, use_cache)
+
+def find_candidate_id_in_google_sheet(candidate_name, opening_name, similarity_threshold=TITLE_MATCH_THRESHOLD):
+    """Tìm candidate_id trong Google Sheet: tên ứng viên phải khớp (không phân biệt hoa thường/dấu), vị trí ứng tuyển so khớp gần đúng"""
+    if not GOOGLE_SHEET_SCRIPT_URL or not candidate_name or not opening_name:
         return None, 0.0, 0.0
     
-    # Tạo map từ candidate_id sang record để lấy thông tin ứng viên và vị trí
-    candidate_map = {}
-    for item in all_data:
-        candidate_id = str(item.get('candidate_id', ''))
-        if candidate_id:
-            if candidate_id not in candidate_map:
-                candidate_map[candidate_id] = {
-                    'candidate_id': candidate_id,
-                    'ten_ung_vien': item.get('Tên ứng viên', ''),
-                    'cong_viec_ung_tuyen': item.get('Công việc ứng tuyển', '')
-                }
-    
-    if not candidate_map:
+    # Index ứng viên trên Google Sheet (cache theo dữ liệu sheet, không dựng lại mỗi request)
+    sheet_index = get_sheet_candidate_index()
+    if not sheet_index:
         return None, 0.0, 0.0
+    candidate_ids = sheet_index['candidate_ids']
     
     # Kiểm tra exact match trước
-    exact_match = next(
-        (c for c in candidate_map.values() 
-         if c.get('ten_ung_vien') == candidate_name and c.get('cong_viec_ung_tuyen') == opening_name),
-        None
-    )
-    if exact_match:
-        return exact_match.get('candidate_id'), 1.0, 1.0
+    exact_id = sheet_index['exact_index'].get((candidate_name, opening_name))
+    if exact_id:
+        return exact_id, 1.0, 1.0
+    
+    # Chỉ xét các dòng cùng tên ứng viên rồi mới so khớp gần đúng vị trí: so khớp trên chuỗi "tên + vị trí"
+    # thì các token chung ("Nguyễn", "Thị", tên vị trí) kéo một ứng viên khác vượt ngưỡng
+    rows = sheet_index['rows_by_name'].get(normalize_name(candidate_name))
+    if not rows:
+        return None, 0.0, 0.0
     
-    # Dùng cosine similarity để tìm ứng viên phù hợp nhất
     try:
-        # Tạo danh sách tên ứng viên và vị trí ứng tuyển
-        candidate_names = [c.get('ten_ung_vien', '') for c in candidate_map.values()]
-        opening_names = [c.get('cong_viec_ung_tuyen', '') for c in candidate_map.values()]
-        
-        # Kết hợp tên ứng viên và vị trí để tìm kiếm tốt hơn
-        combined_texts = [
-            f"{name} {opening}" 
-            for name, opening in zip(candidate_names, opening_names)
-        ]
-        query_text = f"{candidate_name} {opening_name}"
-        
-        # Vectorize và tính similarity
-        vectorizer = TfidfVectorizer()
-        text_vectors = vectorizer.fit_transform(combined_texts)
-        query_vector = vectorizer.transform([query_text])
-        
-        similarities = cosine_similarity(query_vector, text_vectors).flatten()
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
+        best_pos, best_similarity = best_name_match(opening_name, [sheet_index['openings'][row] for row in rows])
         
-        # Nếu similarity >= threshold, trả về candidate_id đó
+        # Nếu similarity của vị trí >= threshold, trả về candidate_id đó
         if best_similarity >= similarity_threshold:
-            candidate_list = list(candidate_map.values())
-            if best_idx < len(candidate_list):
-                best_candidate = candidate_list[best_idx]
-                return best_candidate.get('candidate_id'), float(best_similarity), 0.0
+            return candidate_ids[rows[best_pos]], float(best_similarity), 0.0
         
         return None, float(best_similarity), 0.0
     except Exception:
         return None, 0.0, 0.0
 
-def find_test_by_name(test_results, test_name_query, similarity_threshold=0.5):
+def find_test_by_name(test_results, test_name_query, similarity_threshold=TITLE_MATCH_THRESHOLD):
     """Tìm bài test cụ thể trong danh sách test_results bằng cosine similarity với test_name_query"""
     if not test_results or not isinstance(test_results, list):
         return None, 0.0
@@ -1059,15 +1734,9 @@ def find_test_by_name(test_results, test_name_query, similarity_threshold=0.5):
     if not test_names:
         return None, 0.0
     
-    # Dùng cosine similarity để tìm test name gần nhất
+    # Dùng RapidFuzz WRatio (fallback cosine) để tìm test name gần nhất
     try:
-        vectorizer = TfidfVectorizer()
-        name_vectors = vectorizer.fit_transform(test_names)
-        query_vector = vectorizer.transform([test_name_query])
-        
-        similarities = cosine_similarity(query_vector, name_vectors).flatten()
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
+        best_idx, best_similarity = best_text_match(test_name_query, test_names)
         
         # Nếu similarity >= threshold, trả về test đó
         if best_similarity >= similarity_threshold:
@@ -1080,43 +1749,45 @@ def find_test_by_name(test_results, test_name_query, similarity_threshold=0.5):
     except Exception:
         return None, 0.0
 
-def get_candidate_details(candidate_id, api_key):
-    """Lấy và xử lý dữ liệu chi tiết ứng viên từ API Base.vn, trả về JSON phẳng"""
-    url = "https://hiring.base.vn/publicapi/v2/candidate/get"
-    
-    payload = {
-        'access_token': api_key,
-        'id': candidate_id
-    }
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API khi lấy chi tiết ứng viên: {e}")
-    
-    raw_response = response.json()
-    
-    # Kiểm tra API có trả về lỗi logic không (vd: 'code': 1 là thành công)
-    if raw_response.get('code') != 1 or not raw_response.get('candidate'):
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Không tìm thấy ứng viên với ID '{candidate_id}'. {raw_response.get('message', '')}"
-        )
+def get_candidate_details(candidate_id, api_key, with_reviews=True, use_cache=True):
+    """Lấy và xử lý dữ liệu chi tiết ứng viên từ API Base.vn, trả về JSON phẳng (with_reviews=False bỏ qua xử lý reviews)"""
+    def load():
+        url = "https://hiring.base.vn/publicapi/v2/candidate/get"
+        
+        payload = {
+            'access_token': api_key,
+            'id': candidate_id
+        }
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        
+        try:
+            response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=503, detail=f"Lỗi kết nối đến Base API khi lấy chi tiết ứng viên: {e}")
+        
+        raw_response = _json_loads(response.content)
+        
+        # Kiểm tra API có trả về lỗi logic không (vd: 'code': 1 là thành công)
+        if raw_response.get('code') != 1 or not raw_response.get('candidate'):
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Không tìm thấy ứng viên với ID '{candidate_id}'. {raw_response.get('message', '')}"
+            )
+        
+        return raw_response.get('candidate', {})
     
-    # Lấy dữ liệu gốc của ứng viên
-    candidate_data = raw_response.get('candidate', {})
+    # Lấy dữ liệu gốc của ứng viên (cache ngắn theo candidate_id: /api/candidate và /api/offer-letter
+    # thường được gọi liền nhau cho cùng ứng viên; chỉ cache payload gốc, dict trả về luôn dựng mới)
+    candidate_data = _get_cached('candidate_details', (str(candidate_id), _hash_key(api_key)), load, use_cache)
     
     # Hàm trợ giúp để "làm phẳng" các danh sách lồng nhau
     def flatten_fields(field_list):
-        """Chuyển đổi danh sách [{'id': 'key1', 'value': 'val1'}, ...] thành {'key1': 'val1', ...}"""
-        flat_dict = {}
+        """Duyệt danh sách [{'id': 'key1', 'value': 'val1'}, ...] và sinh các cặp ('key1', 'val1')"""
         if isinstance(field_list, list):
             for item in field_list:
                 if isinstance(item, dict) and 'id' in item:
-                    flat_dict[item['id']] = item.get('value')
-        return flat_dict
+                    yield item['id'], item.get('value')
     
     # Bắt đầu với các trường dữ liệu chính
     refined_data = {
@@ -1143,17 +1814,16 @@ def get_candidate_details(candidate_id, api_key):
         'cv_url': (candidate_data.get('cvs') or [None])[0]
     }
     
-    # Xử lý và gộp dữ liệu từ 'fields' và 'form'
-    field_data = flatten_fields(candidate_data.get('fields', []))
-    form_data = flatten_fields(candidate_data.get('form', []))
+    # Gộp dữ liệu từ 'fields' rồi 'form' thẳng vào dict chính (không tạo dict trung gian)
+    for field_list in (candidate_data.get('fields', []), candidate_data.get('form', [])):
+        for key, value in flatten_fields(field_list):
+            refined_data[key] = value
     
-    # Cập nhật vào dict chính
-    refined_data.update(field_data)
-    refined_data.update(form_data)
-    
-    # Xử lý evaluations để lấy reviews chi tiết
-    reviews = process_evaluations(candidate_data.get('evaluations', []))
-    refined_data['reviews'] = reviews
+    # Xử lý evaluations để lấy reviews chi tiết (caller chỉ cần thông tin cơ bản thì bỏ qua:
+    # tránh làm sạch HTML từng review và lượt gọi Account API lấy thông tin users)
+    if with_reviews:
+        reviews = process_evaluations(candidate_data.get('evaluations', []))
+        refined_data['reviews'] = reviews
     
     return refined_data
 
@@ -1202,43 +1872,53 @@ class CandidateResponse(BaseModel):
 
 # =================================================================
 # API Endpoints
+# Các endpoint gọi helper blocking (requests, parse PDF) nên khai báo `def`
+# để FastAPI chạy trong threadpool, không chặn event loop giữa các request.
 # =================================================================
 
+# Payload health check không đổi: serialize sẵn một lần lúc import
+_ROOT_RESPONSE_BODY = _json_dumps({
+    "status": "ok",
+    "message": "Base Hiring API - Trích xuất JD và CV",
+    "endpoints": {
+        "get_candidates": "/api/opening/{opening_name_or_id}/candidates",
+        "get_job_description": "/api/opening/job-description?opening_name_or_id={opening_name_or_id}",
+        "get_interviews": "/api/interviews",
+        "get_candidate_details": "/api/candidate",
+        "get_offer_letter": "/api/offer-letter",
+        "get_feedback": "/api/feedback"
+    },
+    "note": "Có thể sử dụng opening_name hoặc opening_id. Hệ thống sẽ tự động tìm opening gần nhất bằng cosine similarity nếu dùng name."
+})
+
 @app.get("/", operation_id="healthCheck")
 async def root():
     """Health check - Kiểm tra trạng thái API"""
-    return {
-        "status": "ok",
-        "message": "Base Hiring API - Trích xuất JD và CV",
-        "endpoints": {
-            "get_candidates": "/api/opening/{opening_name_or_id}/candidates",
-            "get_job_description": "/api/opening/job-description?opening_name_or_id={opening_name_or_id}",
-            "get_interviews": "/api/interviews",
-            "get_candidate_details": "/api/candidate",
-            "get_offer_letter": "/api/offer-letter",
-            "get_feedback": "/api/feedback"
-        },
-        "note": "Có thể sử dụng opening_name hoặc opening_id. Hệ thống sẽ tự động tìm opening gần nhất bằng cosine similarity nếu dùng name."
-    }
+    return Response(content=_ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/api/opening/job-description", operation_id="layJobDescriptionTheoOpening")
-async def get_job_description_by_opening(
+def get_job_description_by_opening(
     opening_name_or_id: Optional[str] = Query(None, description="Tên hoặc ID của vị trí tuyển dụng. Bỏ trống để lấy tất cả các opening có status 10.")
 ):
     """Lấy JD (Job Description) theo opening_name hoặc opening_id. Nếu không có tham số hoặc không tìm thấy, trả về tất cả các opening có status 10 (chỉ id và name)."""
     try:
-        # Lấy danh sách openings có status 10 (chỉ id và name)
-        openings = get_base_openings(BASE_API_KEY, use_cache=True)
-        
         # Nếu không có opening_name_or_id, trả về tất cả các opening có status 10 (chỉ id và name)
+        # (payload giống nhau giữa các request nên cache ngắn, bỏ qua toàn bộ phần xử lý)
         if not opening_name_or_id:
-            return {
-                "success": True,
-                "query": None,
-                "message": "Trả về tất cả các opening có status 10.",
-                "total_openings": len(openings),
-                "openings": openings
-            }
+            def build_all_openings_response():
+                openings = get_base_openings(BASE_API_KEY, use_cache=True)
+                return {
+                    "success": True,
+                    "query": None,
+                    "message": "Trả về tất cả các opening có status 10.",
+                    "total_openings": len(openings),
+                    "openings": openings
+                }
+            
+            return _get_cached('responses', ('job-description',), build_all_openings_response)
+        
+        # Lấy danh sách openings có status 10 (chỉ id và name)
+        openings = get_base_openings(BASE_API_KEY, use_cache=True)
         
         # Tìm opening_id từ name hoặc id bằng cosine similarity
         opening_id, matched_name, similarity_score = find_opening_id_by_name(
@@ -1258,13 +1938,7 @@ async def get_job_description_by_opening(
             }
         
         # Lấy JD (Job Description) để tìm JD cụ thể
-        jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-        jd = next((jd for jd in jds if jd['id'] == opening_id), None)
-        
-        if not jd:
-            # Thử làm mới cache nếu không tìm thấy
-            jds = get_job_descriptions(BASE_API_KEY, use_cache=False)
-            jd = next((jd for jd in jds if jd['id'] == opening_id), None)
+        jd = get_job_description_by_id(opening_id, BASE_API_KEY)
         
         # Nếu vẫn không tìm thấy JD cụ thể, trả về tất cả các opening có status 10 (chỉ id và name)
         if not jd:
@@ -1297,7 +1971,7 @@ async def get_job_description_by_opening(
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy JD: {str(e)}")
 
 @app.get("/api/opening/{opening_name_or_id}/candidates", operation_id="layUngVienTheoOpening")
-async def get_candidates_by_opening(
+def get_candidates_by_opening(
     opening_name_or_id: str = Path(..., description="Tên hoặc ID của vị trí tuyển dụng"),
     start_date: Optional[str] = Query(None, description="Ngày bắt đầu lọc ứng viên (YYYY-MM-DD). Bỏ trống để lấy tất cả."),
     end_date: Optional[str] = Query(None, description="Ngày kết thúc lọc ứng viên (YYYY-MM-DD). Bỏ trống để lấy tất cả."),
@@ -1307,35 +1981,20 @@ async def get_candidates_by_opening(
     try:
         start_date_obj, end_date_obj = None, None
         if start_date:
-            start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
+            start_date_obj = parse_iso_date(start_date)
         if end_date:
-            end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
+            end_date_obj = parse_iso_date(end_date)
         
         if start_date_obj and end_date_obj and start_date_obj > end_date_obj:
             raise HTTPException(status_code=400, detail="Ngày kết thúc phải sau ngày bắt đầu")
         
-        # Tìm opening_id từ name hoặc id bằng cosine similarity
-        opening_id, matched_name, similarity_score = find_opening_id_by_name(
-            opening_name_or_id, 
-            BASE_API_KEY
-        )
-        
-        if not opening_id:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'. Similarity score cao nhất: {similarity_score:.2f}"
-            )
+        # Tìm opening_id từ name hoặc id bằng cosine similarity (404 nếu không có)
+        opening_id, matched_name, similarity_score = require_opening(opening_name_or_id, BASE_API_KEY)
         
         candidates = get_candidates_for_opening(opening_id, BASE_API_KEY, start_date_obj, end_date_obj, stage_name)
         
         # Lấy JD (Job Description)
-        jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-        jd = next((jd for jd in jds if jd['id'] == opening_id), None)
-        
-        if not jd:
-            # Thử làm mới cache nếu không tìm thấy
-            jds = get_job_descriptions(BASE_API_KEY, use_cache=False)
-            jd = next((jd for jd in jds if jd['id'] == opening_id), None)
+        jd = get_job_description_by_id(opening_id, BASE_API_KEY)
         
         job_description = jd['job_description'] if jd else None
         
@@ -1357,7 +2016,7 @@ async def get_candidates_by_opening(
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy ứng viên: {str(e)}")
 
 @app.get("/api/interviews", operation_id="layLichPhongVan")
-async def get_interviews_by_opening(
+def get_interviews_by_opening(
     opening_name_or_id: Optional[str] = Query(None, description="Tên hoặc ID của vị trí tuyển dụng để lọc. Bỏ trống để lấy tất cả."),
     date: Optional[str] = Query(None, description="Lấy lịch phỏng vấn cho 1 ngày cụ thể (YYYY-MM-DD). Nếu có tham số này, sẽ bỏ qua start_date và end_date."),
     start_date: Optional[str] = Query(None, description="Ngày bắt đầu lọc lịch phỏng vấn (YYYY-MM-DD). Bỏ trống để lấy tất cả."),
@@ -1369,7 +2028,7 @@ async def get_interviews_by_opening(
         
         # Nếu có tham số date, dùng nó để lọc dựa trên time_dt
         if date:
-            filter_date_obj = datetime.strptime(date, "%Y-%m-%d").date()
+            filter_date_obj = parse_iso_date(date)
         
         opening_id = None
         matched_name = None
@@ -1414,7 +2073,7 @@ async def get_interviews_by_opening(
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy lịch phỏng vấn: {str(e)}")
 
 @app.get("/api/candidate", operation_id="layChiTietUngVien")
-async def get_candidate_details_endpoint(
+def get_candidate_details_endpoint(
     candidate_id: Optional[str] = Query(None, description="ID của ứng viên. Bắt buộc nếu không có opening_name_or_id và candidate_name."),
     opening_name_or_id: Optional[str] = Query(None, description="Tên hoặc ID của vị trí tuyển dụng để tìm kiếm bằng cosine similarity. Bắt buộc nếu không có candidate_id."),
     candidate_name: Optional[str] = Query(None, description="Tên ứng viên để tìm kiếm bằng cosine similarity trong opening. Bắt buộc nếu không có candidate_id.")
@@ -1435,24 +2094,15 @@ async def get_candidate_details_endpoint(
                     detail="Phải cung cấp candidate_id, hoặc cả opening_name_or_id và candidate_name"
                 )
             
-            # Tìm opening_id từ opening_name_or_id bằng cosine similarity
-            opening_id, opening_name_matched, opening_similarity = find_opening_id_by_name(
-                opening_name_or_id,
-                BASE_API_KEY
-            )
-            
-            if not opening_id:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'. Similarity score cao nhất: {opening_similarity:.2f}"
-                )
+            # Tìm opening_id từ opening_name_or_id bằng cosine similarity (404 nếu không có)
+            opening_id, opening_name_matched, opening_similarity = require_opening(opening_name_or_id, BASE_API_KEY)
             
             # Tìm candidate trong opening đó bằng tên với cosine similarity (không filter stage)
             found_candidate_id, candidate_similarity = find_candidate_by_name_in_opening(
                 candidate_name,
                 opening_id,
                 BASE_API_KEY,
-                similarity_threshold=0.5,
+                similarity_threshold=NAME_MATCH_THRESHOLD,
                 filter_stages=None  # Không lọc stage cho endpoint candidate
             )
             
@@ -1462,46 +2112,46 @@ async def get_candidate_details_endpoint(
                     error_msg += f"Candidate similarity score cao nhất: {candidate_similarity:.2f}"
                 raise HTTPException(status_code=404, detail=error_msg)
         
-        # Lấy dữ liệu chi tiết ứng viên
-        candidate_data = get_candidate_details(found_candidate_id, BASE_API_KEY)
-        
-        # Trích xuất cv_text từ cv_url nếu có
-        cv_url = candidate_data.get('cv_url')
-        cv_text = None
-        if cv_url:
-            cv_text = extract_text_from_cv_url(cv_url)
-            candidate_data['cv_text'] = cv_text
-        
-        # Lấy dữ liệu bài test từ Google Sheet
-        test_results = get_test_results_from_google_sheet(found_candidate_id)
-        candidate_data['test_results'] = test_results
-        
-        # Lấy JD dựa trên opening name
-        opening_name = candidate_data.get('vi_tri_ung_tuyen')
-        opening_id = candidate_data.get('opening_id')
-        job_description = None
-        
-        if opening_name or opening_id:
-            # Tìm opening_id nếu chỉ có opening_name
-            if not opening_id and opening_name:
-                opening_id, matched_name, similarity_score = find_opening_id_by_name(
-                    opening_name,
-                    BASE_API_KEY
-                )
+        # Chạy song song các lượt gọi mạng độc lập: bài test (Google Sheet) chỉ cần candidate_id nên chạy cùng
+        # lúc với Base API, tải/parse CV bắt đầu ngay khi có cv_url và chạy trong lúc tìm JD
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Lấy dữ liệu bài test từ Google Sheet
+            test_future = executor.submit(get_test_results_from_google_sheet, found_candidate_id)
             
-            # Lấy JD nếu có opening_id
-            if opening_id:
-                jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-                jd = next((jd for jd in jds if jd['id'] == opening_id), None)
-                
-                if not jd:
-                    # Thử làm mới cache nếu không tìm thấy
-                    jds = get_job_descriptions(BASE_API_KEY, use_cache=False)
-                    jd = next((jd for jd in jds if jd['id'] == opening_id), None)
+            # Lấy dữ liệu chi tiết ứng viên
+            candidate_data = get_candidate_details(found_candidate_id, BASE_API_KEY)
+            
+            # Trích xuất cv_text từ cv_url nếu có
+            cv_url = candidate_data.get('cv_url')
+            cv_future = executor.submit(extract_text_from_cv_url, cv_url) if cv_url else None
+            
+            # Lấy JD dựa trên opening name; opening_id ưu tiên lấy từ candidate_data, sau đó dùng lại
+            # opening đã khớp từ opening_name_or_id (ứng viên được tìm trong chính opening đó)
+            opening_name = candidate_data.get('vi_tri_ung_tuyen')
+            opening_id = candidate_data.get('opening_id') or opening_id
+            job_description = None
+            
+            if opening_name or opening_id:
+                # Chỉ tìm opening_id theo tên khi chưa biết id từ cả hai nguồn trên
+                if not opening_id and opening_name:
+                    opening_id, matched_name, similarity_score = find_opening_id_by_name(
+                        opening_name,
+                        BASE_API_KEY
+                    )
                 
-                if jd:
-                    job_description = jd['job_description']
-                    candidate_data['job_description'] = job_description
+                # Lấy JD nếu có opening_id
+                if opening_id:
+                    jd = get_job_description_by_id(opening_id, BASE_API_KEY)
+                    
+                    if jd:
+                        job_description = jd['job_description']
+            
+            # Gộp kết quả theo đúng thứ tự key cũ: cv_text, test_results, job_description
+            if cv_future is not None:
+                candidate_data['cv_text'] = cv_future.result()
+            candidate_data['test_results'] = test_future.result()
+            if job_description:
+                candidate_data['job_description'] = job_description
         
         result = {
             "success": True,
@@ -1524,7 +2174,7 @@ async def get_candidate_details_endpoint(
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy chi tiết ứng viên: {str(e)}")
 
 @app.get("/api/offer-letter", operation_id="layOfferLetterTheoUngVien")
-async def get_offer_letter_by_candidate(
+def get_offer_letter_by_candidate(
     candidate_id: Optional[str] = Query(None, description="ID của ứng viên. Bắt buộc nếu không có opening_name_or_id và candidate_name."),
     opening_name_or_id: Optional[str] = Query(None, description="Tên hoặc ID của vị trí tuyển dụng để tìm kiếm bằng cosine similarity. Bắt buộc nếu không có candidate_id."),
     candidate_name: Optional[str] = Query(None, description="Tên ứng viên để tìm kiếm bằng cosine similarity trong opening. Bắt buộc nếu không có candidate_id.")
@@ -1545,24 +2195,15 @@ async def get_offer_letter_by_candidate(
                     detail="Phải cung cấp candidate_id, hoặc cả opening_name_or_id và candidate_name"
                 )
             
-            # Tìm opening_id từ opening_name_or_id bằng cosine similarity
-            opening_id, opening_name_matched, opening_similarity = find_opening_id_by_name(
-                opening_name_or_id,
-                BASE_API_KEY
-            )
-            
-            if not opening_id:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'. Similarity score cao nhất: {opening_similarity:.2f}"
-                )
+            # Tìm opening_id từ opening_name_or_id bằng cosine similarity (404 nếu không có)
+            opening_id, opening_name_matched, opening_similarity = require_opening(opening_name_or_id, BASE_API_KEY)
             
             # Tìm candidate trong opening đó bằng tên với cosine similarity (chỉ tìm trong stage "Offered" và "Hired")
             found_candidate_id, candidate_similarity = find_candidate_by_name_in_opening(
                 candidate_name,
                 opening_id,
                 BASE_API_KEY,
-                similarity_threshold=0.5,
+                similarity_threshold=NAME_MATCH_THRESHOLD,
                 filter_stages=['Offered', 'Hired']  # Chỉ lọc stage cho offer letter
             )
             
@@ -1572,14 +2213,19 @@ async def get_offer_letter_by_candidate(
                     error_msg += f"Candidate similarity score cao nhất: {candidate_similarity:.2f}"
                 raise HTTPException(status_code=404, detail=error_msg)
         
-        # Lấy thông tin cơ bản của ứng viên để lấy tên và vị trí ứng tuyển
-        candidate_data = get_candidate_details(found_candidate_id, BASE_API_KEY)
-        
-        candidate_name_result = candidate_data.get('ten')
-        vi_tri_ung_tuyen = candidate_data.get('vi_tri_ung_tuyen')
-        
-        # Lấy offer letter
-        offer_letter = get_offer_letter(found_candidate_id, BASE_API_KEY)
+        # Hai lượt gọi chỉ cần candidate_id nên chạy song song: offer letter (message + file đính kèm)
+        # chạy trong worker thread trong lúc lấy thông tin cơ bản của ứng viên
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Lấy offer letter
+            offer_letter_future = executor.submit(get_offer_letter, found_candidate_id, BASE_API_KEY)
+            
+            # Lấy thông tin cơ bản của ứng viên để lấy tên và vị trí ứng tuyển
+            candidate_data = get_candidate_details(found_candidate_id, BASE_API_KEY, with_reviews=False)
+            
+            candidate_name_result = candidate_data.get('ten')
+            vi_tri_ung_tuyen = candidate_data.get('vi_tri_ung_tuyen')
+            
+            offer_letter = offer_letter_future.result()
         
         if not offer_letter:
             raise HTTPException(
@@ -1610,13 +2256,18 @@ async def get_offer_letter_by_candidate(
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy offer letter: {str(e)}")
 
 @app.get("/api/feedback", operation_id="layFeedbackData")
-async def get_feedback_data(
+def get_feedback_data(
     start_date: Optional[str] = Query(None, description="Ngày bắt đầu lọc (YYYY-MM-DD). Lọc các bản ghi có thời gian >= start_date."),
     job_description: Optional[str] = Query(None, description="Mô tả công việc hoặc tên vị trí để lọc ứng viên phù hợp (dùng cosine similarity).")
 ):
     """Lấy dữ liệu feedback của các ứng viên từ Google Sheet. Có thể lọc theo ngày bắt đầu và vị trí ứng tuyển (similarity)."""
     try:
-        feedback_data = get_feedback_data_from_google_sheet(start_date, job_description)
+        # Cache ngắn theo (start_date, job_description): request lặp lại không gọi lại Google Sheet
+        feedback_data = _get_cached(
+            'responses',
+            ('feedback', start_date, job_description),
+            lambda: get_feedback_data_from_google_sheet(start_date, job_description)
+        )
         
         if not feedback_data:
             msg = "Không tìm thấy dữ liệu feedback"
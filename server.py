@@ -1,25 +1,61 @@
 import os
+import asyncio
 from dotenv import load_dotenv
 from typing import List, Optional, Any, Dict
 from fastmcp import FastMCP, Context
 
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from collections import defaultdict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from time import time
-import pdfplumber
 from io import BytesIO
-from sklearn.feature_extraction.text import TfidfVectorizer
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
 try:
     from docx import Document
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+try:
+    import pymupdf as fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    try:
+        # PyMuPDF bản cũ chỉ có module fitz
+        import fitz
+        FITZ_AVAILABLE = True
+    except ImportError:
+        FITZ_AVAILABLE = False
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    from rapidfuzz import process as fuzz_process, fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
 from pytz import timezone
 import re
+import json
+import hashlib
+import unicodedata
+from functools import lru_cache
 from html import unescape
 
 load_dotenv()
@@ -36,108 +72,249 @@ if not BASE_API_KEY:
 # Account API Key (optional) - để lấy thông tin users cho reviews
 ACCOUNT_API_KEY = os.getenv('ACCOUNT_API_KEY', None)
 
+# HTTP session dùng chung cho mọi request ra ngoài (keep-alive, tái sử dụng kết nối TLS)
+HTTP_POOL_CONNECTIONS = 20   # số host khác nhau được giữ pool
+HTTP_POOL_MAXSIZE = 50       # số kết nối tối đa mỗi host
+# Retry lỗi gateway tạm thời; các API Base dùng ở đây đều chỉ đọc nên retry cả POST là an toàn
+_http_retry = Retry(
+    total=2,
+    backoff_factor=0.3,
+    status_forcelist=[502, 503, 504],
+    allowed_methods=frozenset(['GET', 'HEAD', 'POST'])
+)
+_SESSION = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=_http_retry)
+_SESSION.mount('https://', _http_adapter)
+_SESSION.mount('http://', _http_adapter)
+
 # Cache configuration
 CACHE_TTL = 300  # 5 phút cache
 _cache = {
     'openings': {'data': None, 'timestamp': 0},
     'job_descriptions': {'data': None, 'timestamp': 0},
-    'users_info': {'data': None, 'timestamp': 0}
+    'users_info': {'data': None, 'timestamp': 0},
+    # Index id/tên -> opening, dựng lại mỗi khi danh sách openings được làm mới
+    'openings_index': {'source': None, 'by_id': {}, 'by_name': {}},
+    # Index id -> JD, dựng lại mỗi khi danh sách JD được làm mới
+    'jd_index': {'source': None, 'by_id': {}},
+    # candidate_id -> opening_name lấy từ lịch phỏng vấn (fallback cho get_candidate_details)
+    'interview_index': {'data': None, 'timestamp': 0},
+    # TF-IDF đã fit sẵn: data = (key, vectorizer, matrix)
+    'opening_vectorizer': {'data': None, 'timestamp': 0},
+    'stage_vectorizer': {'data': None, 'timestamp': 0}
 }
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # kích thước chunk khi tải file CV/offer letter
+CV_EXTRACT_WORKERS = int(os.getenv('CV_EXTRACT_WORKERS', 8))  # số CV được tải/trích xuất song song cho một vị trí
+# Thread pool dùng chung để các tool async tải/trích xuất CV mà không chặn event loop (và làm mới cache ở nền)
+_CV_POOL = ThreadPoolExecutor(max_workers=CV_EXTRACT_WORKERS)
+
+# Cache text CV trên đĩa theo URL (file CV trên Base CDN không đổi nội dung theo URL)
+# Text CV chứa PII nên chỉ bật khi đặt CV_CACHE_DIR; thư mục 0o700, file 0o600
+CV_CACHE_DIR = os.getenv('CV_CACHE_DIR') or None
+CV_CACHE_TTL = int(os.getenv('CV_CACHE_TTL', 7 * 24 * 3600))  # 1 tuần
+CV_CACHE_MAX_FILES = int(os.getenv('CV_CACHE_MAX_FILES', 5000))
+CV_CACHE_SWEEP_INTERVAL = 3600  # dọn file quá hạn/vượt số lượng tối đa mỗi giờ một lần (lúc ghi cache)
+_cv_cache_swept_at = 0
+_cv_cache_sweep_lock = threading.Lock()
+
+# Các key _cache đang được làm mới ở thread nền (stale-while-revalidate)
+_refreshing = set()
+_refresh_lock = threading.Lock()
+# Các lời gọi Base API đang chạy (single-flight): key -> Future kết quả
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Parser cho BeautifulSoup: lxml (C) nhanh hơn nhiều so với html.parser thuần Python
+_BS_PARSER = "lxml" if LXML_AVAILABLE else "html.parser"
+
+# Múi giờ hiển thị thời gian (tra pytz một lần)
+HCM_TZ = timezone('Asia/Ho_Chi_Minh')
+
+# Regex dùng lại cho remove_html_tags (compile một lần)
+_BR_TAG_RE = re.compile(r'<br\s*/?>')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+# HTML dài hơn ngưỡng này thì dùng lxml text_content thay cho regex
+LXML_TEXT_MIN_LENGTH = 4096
+
 # =================================================================
 # Helper Functions
 # =================================================================
 
-def get_base_openings(api_key, use_cache=True):
-    """Truy xuất vị trí tuyển dụng đang hoạt động từ Base API (có cache)"""
-    current_time = time()
-    if not api_key:
-        raise Exception("BASE_API_KEY chưa được cấu hình")
+def _json_loads(content):
+    """Parse JSON (bytes/str) bằng orjson nếu có, fallback json"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _store_cache(key, data):
+    """Lưu data vào _cache[key] (bỏ qua nếu data là None) và trả về data"""
+    if data is not None:
+        _cache[key] = {'data': data, 'timestamp': time()}
+    return data
+
+def _refresh_in_background(key, loader):
+    """Chạy loader trên _CV_POOL để làm mới _cache[key]; mỗi key chỉ một lượt làm mới tại một thời điểm"""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
     
-    # Kiểm tra cache nếu được bật
-    if use_cache and _cache['openings']['data'] is not None:
-        if current_time - _cache['openings']['timestamp'] < CACHE_TTL:
-            return _cache['openings']['data']
+    def run():
+        try:
+            _store_cache(key, loader())
+        except Exception:
+            # Làm mới lỗi thì giữ dữ liệu cũ, lần gọi sau sẽ thử lại
+            pass
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
     
-    url = "https://hiring.base.vn/publicapi/v2/opening/list"
-    payload = {'access_token_v2': api_key}
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    _CV_POOL.submit(run)
+
+def _single_flight(key, fn):
+    """Gộp các lời gọi trùng key đang chạy đồng thời: chỉ một thread gọi fn, các thread khác chờ chung kết quả"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[key] = future
+    if not is_owner:
+        return future.result()
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Lỗi kết nối đến Base API: {e}")
+        result = fn()
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _get_or_refresh(key, loader, use_cache=True):
+    """Đọc _cache[key] kiểu stale-while-revalidate: còn hạn thì trả ngay; quá hạn < 2*CACHE_TTL thì trả dữ liệu cũ
+    và làm mới ở nền; cũ hơn nữa (hoặc chưa có) thì gọi loader đồng bộ. loader trả về None nghĩa là không cache."""
+    if not use_cache:
+        return loader()
+    
+    entry = _cache[key]
+    if entry['data'] is not None:
+        age = time() - entry['timestamp']
+        if age < CACHE_TTL:
+            return entry['data']
+        if age < CACHE_TTL * 2:
+            _refresh_in_background(key, loader)
+            return entry['data']
+    return _store_cache(key, loader())
 
-    data = response.json()
-    openings = data.get('openings', [])
+def get_base_openings(api_key, use_cache=True):
+    """Truy xuất vị trí tuyển dụng đang hoạt động từ Base API (có cache)"""
+    if not api_key:
+        raise Exception("BASE_API_KEY chưa được cấu hình")
     
-    # Lọc vị trí với trạng thái '10' (đang hoạt động)
-    filtered_openings = [
-        {"id": opening['id'], "name": opening['name']}
-        for opening in openings
-        if opening.get('status') == '10'
-    ]
+    def load():
+        url = "https://hiring.base.vn/publicapi/v2/opening/list"
+        payload = {'access_token_v2': api_key}
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        
+        try:
+            response = _SESSION.post(url, headers=headers, data=payload, timeout=10)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Lỗi kết nối đến Base API: {e}")
+
+        data = _json_loads(response.content)
+        openings = data.get('openings', [])
+        
+        # Lọc vị trí với trạng thái '10' (đang hoạt động)
+        return [
+            {"id": opening['id'], "name": opening['name']}
+            for opening in openings
+            if opening.get('status') == '10'
+        ]
     
-    # Lưu vào cache
-    if use_cache:
-        _cache['openings'] = {'data': filtered_openings, 'timestamp': current_time}
+    return _get_or_refresh('openings', load, use_cache)
+
+def _parse_opening_jd(opening):
+    """Parse HTML JD của một opening đang mở thành dict kết quả (None nếu không đạt)"""
+    if opening.get('status') != '10':  # Chỉ lấy vị trí đang mở
+        return None
+    html_content = opening.get('content', '')
+    soup = BeautifulSoup(html_content, _BS_PARSER)
+    text_content = soup.get_text()
     
-    return filtered_openings
+    if len(text_content) < 10:  # Chỉ lấy JD có nội dung đủ dài
+        return None
+    return {
+        "id": opening['id'],
+        "name": opening['name'],
+        "job_description": text_content.strip(),
+        "html_content": html_content
+    }
+
+def parse_opening_jds(openings):
+    """Parse JD cho danh sách openings"""
+    return [r for r in map(_parse_opening_jd, openings) if r]
 
 def get_job_descriptions(api_key, use_cache=True):
     """Truy xuất JD (Job Description) từ các vị trí tuyển dụng đang mở (có cache)"""
-    current_time = time()
     if not api_key:
         raise Exception("BASE_API_KEY chưa được cấu hình")
-
-    # Kiểm tra cache
-    if use_cache and _cache['job_descriptions']['data'] is not None:
-        if current_time - _cache['job_descriptions']['timestamp'] < CACHE_TTL:
-            return _cache['job_descriptions']['data']
     
-    url = "https://hiring.base.vn/publicapi/v2/opening/list"
-    payload = {'access_token_v2': api_key}
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    def load():
+        url = "https://hiring.base.vn/publicapi/v2/opening/list"
+        payload = {'access_token_v2': api_key}
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
 
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Lỗi kết nối đến Base API: {e}")
+        try:
+            response = _SESSION.post(url, headers=headers, data=payload, timeout=10)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Lỗi kết nối đến Base API: {e}")
 
-    data = response.json()
+        data = _json_loads(response.content)
+        if 'openings' not in data:
+            return None
+        return parse_opening_jds(data['openings'])
     
-    if 'openings' in data:
-        openings = data['openings']
-        results = []
-        
-        for opening in openings:
-            if opening.get('status') == '10':  # Chỉ lấy vị trí đang mở
-                html_content = opening.get('content', '')
-                soup = BeautifulSoup(html_content, "html.parser")
-                text_content = soup.get_text()
-                
-                if len(text_content) >= 10:  # Chỉ lấy JD có nội dung đủ dài
-                    results.append({
-                        "id": opening['id'],
-                        "name": opening['name'],
-                        "job_description": text_content.strip(),
-                        "html_content": html_content
-                    })
-        
-        if use_cache:
-            _cache['job_descriptions'] = {'data': results, 'timestamp': current_time}
-        
-        return results
-    return []
+    # Single-flight: nhiều tool cùng miss/làm mới JD chỉ gọi opening/list một lần
+    results = _get_or_refresh('job_descriptions', lambda: _single_flight(('job_descriptions', api_key), load), use_cache)
+    return results if results is not None else []
+
+def get_job_descriptions_indexed(api_key, use_cache=True):
+    """Dict id -> JD cho danh sách JD hiện tại (chỉ dựng lại khi get_job_descriptions trả về list mới)"""
+    jds = get_job_descriptions(api_key, use_cache)
+    index = _cache['jd_index']
+    if index['source'] is not jds:
+        by_id = {}
+        for jd in jds:
+            by_id.setdefault(jd['id'], jd)
+        if not use_cache:
+            # Danh sách không qua cache: index dùng một lần, không thay index của danh sách đang cache
+            return by_id
+        index = {'source': jds, 'by_id': by_id}
+        _cache['jd_index'] = index
+    return index['by_id']
+
+def get_job_description_by_id(opening_id, api_key):
+    """Tìm JD theo opening_id qua dict index, làm mới cache một lần nếu không thấy"""
+    jd = get_job_descriptions_indexed(api_key, use_cache=True).get(opening_id)
+    if not jd:
+        # Thử làm mới cache nếu không tìm thấy
+        jd = get_job_descriptions_indexed(api_key, use_cache=False).get(opening_id)
+    return jd
 
 def extract_message(evaluations):
     """Trích xuất nội dung văn bản từ đánh giá HTML"""
     if isinstance(evaluations, list) and len(evaluations) > 0:
         raw_html = evaluations[0].get('content', '')
-        soup = BeautifulSoup(raw_html, "html.parser")
-        text = " ".join(soup.stripped_strings)
+        soup = BeautifulSoup(raw_html, _BS_PARSER)
+        text = soup.get_text(" ", strip=True)
         return text
     return None
 
@@ -145,36 +322,45 @@ def remove_html_tags(text):
     """Bỏ HTML tags và chuyển đổi thành text thuần túy"""
     if not text:
         return ""
-    # Chuyển các thẻ <br> thành xuống dòng
-    text = re.sub(r'<br\s*/?>', '\n', text)
-    # Bỏ tất cả các thẻ HTML còn lại
-    text = re.sub(r'<[^>]+>', '', text)
-    # Unescape các ký tự HTML entities (&lt;, &gt;, &amp;, etc.)
-    text = unescape(text)
+    # Chỉ chạy regex tag khi text thực sự có HTML
+    if '<' in text:
+        # Chuyển các thẻ <br> thành xuống dòng
+        text = _BR_TAG_RE.sub('\n', text)
+        if LXML_AVAILABLE and len(text) > LXML_TEXT_MIN_LENGTH:
+            # HTML lớn: lxml bỏ tags và decode entities trong một lượt
+            try:
+                text = lxml_html.fromstring(text).text_content()
+            except Exception:
+                text = unescape(_HTML_TAG_RE.sub('', text))
+        else:
+            # Bỏ tất cả các thẻ HTML còn lại
+            text = _HTML_TAG_RE.sub('', text)
+            if '&' in text:
+                text = unescape(text)
+    elif '&' in text:
+        # Unescape các ký tự HTML entities (&lt;, &gt;, &amp;, etc.)
+        text = unescape(text)
     # Loại bỏ các khoảng trắng thừa
-    text = re.sub(r'\n\s*\n', '\n', text)
+    text = _BLANK_LINES_RE.sub('\n', text)
     return text.strip()
 
 def get_users_info(use_cache=True):
-    """Lấy thông tin users từ Account API và map username -> name + title (có cache)"""
+    """Lấy thông tin users từ Account API và map username -> (name, title) (có cache)"""
     if not ACCOUNT_API_KEY:
         return {}
     
-    current_time = time()
-    
-    # Kiểm tra cache
-    if use_cache and _cache['users_info']['data'] is not None:
-        if current_time - _cache['users_info']['timestamp'] < CACHE_TTL:
-            return _cache['users_info']['data']
-    
-    try:
-        users_url = "https://account.base.vn/extapi/v1/users"
-        users_payload = {'access_token_v2': ACCOUNT_API_KEY}
-        users_response = requests.post(users_url, data=users_payload, timeout=10)
-        users_response.raise_for_status()
-        users_data = users_response.json()
+    def load():
+        try:
+            users_url = "https://account.base.vn/extapi/v1/users"
+            users_payload = {'access_token_v2': ACCOUNT_API_KEY}
+            users_response = _SESSION.post(users_url, data=users_payload, timeout=10)
+            users_response.raise_for_status()
+            users_data = _json_loads(users_response.content)
+        except Exception:
+            # Nếu có lỗi thì không cache
+            return None
         
-        # Tạo dictionary để map username -> name + title
+        # Tạo dictionary để map username -> (name, title)
         username_to_info = {}
         if 'users' in users_data and isinstance(users_data['users'], list):
             for user in users_data['users']:
@@ -186,20 +372,16 @@ def get_users_info(use_cache=True):
                     if name == "Hoang Tran":
                         title = "CEO"
                     
-                    # Kết hợp name và title
-                    if title:
-                        username_to_info[username] = {"name": name, "title": title}
-                    else:
-                        username_to_info[username] = {"name": name, "title": ""}
-        
-        # Lưu vào cache
-        if use_cache:
-            _cache['users_info'] = {'data': username_to_info, 'timestamp': current_time}
-        
+                    # Lưu dạng tuple (name, title) thay vì dict lồng cho mỗi user
+                    username_to_info[username] = (name, title or "")
         return username_to_info
-    except Exception as e:
+    
+    try:
+        username_to_info = _get_or_refresh('users_info', load, use_cache)
+    except Exception:
         # Nếu có lỗi, trả về dict rỗng
         return {}
+    return username_to_info if username_to_info is not None else {}
 
 def process_evaluations(evaluations):
     """Xử lý evaluations và trả về danh sách reviews với đầy đủ thông tin (tên, chức danh, nội dung)"""
@@ -217,9 +399,7 @@ def process_evaluations(evaluations):
             
             # Lấy username và chuyển thành tên thật + chức danh
             username = eval_item.get('username')
-            user_info = username_to_info.get(username, {}) if username else {}
-            name = user_info.get('name', username) if user_info else (username if username else "N/A")
-            title = user_info.get('title', '') if user_info else ''
+            name, title = username_to_info.get(username) or (username or "N/A", "")
             
             review = {
                 "id": eval_item.get('id'),
@@ -231,32 +411,74 @@ def process_evaluations(evaluations):
     
     return reviews
 
+def _extract_pages_fitz(pdf_bytes):
+    """Trích xuất text từng trang bằng PyMuPDF"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [page.get_text("text") for page in doc]
+    finally:
+        doc.close()
+
+def _extract_pages_pdfium(pdf_bytes):
+    """Trích xuất text từng trang bằng pypdfium2"""
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        page_texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+            textpage.close()
+            page.close()
+        return page_texts
+    finally:
+        pdf.close()
+
+def _extract_pages_pdfplumber(pdf_bytes):
+    """Trích xuất text từng trang bằng pdfplumber (chậm, chỉ dùng khi không có PyMuPDF/pypdfium2)"""
+    import pdfplumber
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        return [page.extract_text() for page in pdf.pages]
+
+def _stream_download(url, out, timeout, headers=None):
+    """Tải file từ URL theo từng chunk vào buffer `out` (BytesIO) thay vì giữ toàn bộ response"""
+    with _SESSION.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            out.write(chunk)
+    return out
+
 def extract_text_from_pdf(url=None, file_bytes=None):
-    """Trích xuất text từ PDF URL hoặc file bytes bằng pdfplumber"""
-    pdf_file = None
+    """Trích xuất text từ PDF URL hoặc file bytes (PyMuPDF/pypdfium2, fallback pdfplumber)"""
     if file_bytes:
-        pdf_file = file_bytes
+        pdf_bytes = file_bytes.getvalue() if isinstance(file_bytes, BytesIO) else file_bytes
     elif url:
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            pdf_file = BytesIO(response.content)
+            pdf_bytes = _stream_download(url, BytesIO(), timeout=30).getvalue()
         except Exception:
             return None
     else:
         return None
     
-    try:
-        text = ""
-        with pdfplumber.open(pdf_file) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text()
-                if page_text:
-                    text += f"\n--- Trang {page_num} ---\n"
-                    text += page_text
+    extractors = []
+    if FITZ_AVAILABLE:
+        extractors.append(_extract_pages_fitz)
+    if PDFIUM_AVAILABLE:
+        extractors.append(_extract_pages_pdfium)
+    extractors.append(_extract_pages_pdfplumber)
+    
+    for extract_pages in extractors:
+        try:
+            page_texts = extract_pages(pdf_bytes)
+        except Exception:
+            # Parser lỗi với file này, thử parser tiếp theo
+            continue
+        text = "".join(
+            f"\n--- Trang {page_num} ---\n{page_text}"
+            for page_num, page_text in enumerate(page_texts, 1)
+            if page_text and page_text.strip()
+        )
         return text.strip() if text else None
-    except Exception as e:
-        return None
+    return None
 
 def extract_text_from_docx(file_bytes):
     """Trích xuất text từ DOCX file bytes"""
@@ -275,27 +497,40 @@ def download_file_to_bytes(url):
         return None
     try:
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        return BytesIO(response.content)
+        out = _stream_download(url, BytesIO(), timeout=20, headers=headers)
+        out.seek(0)
+        return out
     except Exception:
         return None
 
+# Đuôi file PDF/DOCX/DOC: với URL xét phần trước query string đầu tiên, với tên file xét cuối chuỗi
+_TARGET_URL_RE = re.compile(r'^[^?]*\.(?:pdf|docx?)(?:\?|\Z)', re.IGNORECASE)
+_TARGET_NAME_RE = re.compile(r'\.(?:pdf|docx?)\Z', re.IGNORECASE)
+
 def is_target_file(url, name):
     """Kiểm tra xem file có phải PDF/DOCX/DOC không"""
     if not url or not name:
         return False
-    url_low = url.lower().split('?')[0]
-    name_low = name.lower()
-    return url_low.endswith(('.pdf', '.docx', '.doc')) or name_low.endswith(('.pdf', '.docx', '.doc'))
+    return bool(_TARGET_URL_RE.match(url) or _TARGET_NAME_RE.search(name))
 
 def find_files_in_html(html_content):
     """Tìm các file PDF/DOCX/DOC trong HTML content"""
     found = []
     if not html_content:
         return found
+    # Chỉ cần các thẻ <a href>: dùng thẳng lxml xpath, không dựng cây BeautifulSoup
+    if LXML_AVAILABLE:
+        try:
+            for a in lxml_html.fromstring(html_content).xpath('//a[@href]'):
+                href = a.get('href').strip()
+                name = a.text_content().strip() or href.split('/')[-1]
+                if is_target_file(href, name):
+                    found.append((href, name))
+            return found
+        except Exception:
+            found = []
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, _BS_PARSER)
         for a in soup.find_all('a', href=True):
             href = a['href'].strip()
             name = a.get_text().strip() or href.split('/')[-1]
@@ -318,9 +553,9 @@ def get_offer_letter(candidate_id, api_key):
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
-        data = response.json()
+        data = _json_loads(response.content)
         
         if not data or 'messages' not in data:
             return None
@@ -377,11 +612,97 @@ def get_offer_letter(candidate_id, api_key):
         # Nếu có lỗi, trả về None (không làm gián đoạn flow chính)
         return None
 
+def _cv_cache_path(url):
+    """Đường dẫn file cache text CV cho URL"""
+    return os.path.join(CV_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.txt')
+
+def _read_cv_cache(url):
+    """Đọc text CV đã cache trên đĩa (None nếu tắt cache, chưa có hoặc đã quá CV_CACHE_TTL; file quá hạn bị xóa)"""
+    if not CV_CACHE_DIR:
+        return None
+    path = _cv_cache_path(url)
+    try:
+        if time() - os.path.getmtime(path) >= CV_CACHE_TTL:
+            os.remove(path)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _sweep_cv_cache():
+    """Xóa file cache CV quá CV_CACHE_TTL, và các file cũ nhất khi vượt CV_CACHE_MAX_FILES"""
+    now = time()
+    entries = []
+    try:
+        with os.scandir(CV_CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith('.txt'):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime >= CV_CACHE_TTL:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                else:
+                    entries.append((mtime, entry.path))
+    except OSError:
+        return
+    if len(entries) > CV_CACHE_MAX_FILES:
+        entries.sort()
+        for _, path in entries[:len(entries) - CV_CACHE_MAX_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _write_cv_cache(url, text):
+    """Ghi text CV xuống đĩa với quyền 0o600 (ghi file tạm rồi os.replace để không đọc phải file ghi dở)"""
+    global _cv_cache_swept_at
+    if not CV_CACHE_DIR:
+        return
+    path = _cv_cache_path(url)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CV_CACHE_DIR, mode=0o700, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Không ghi được cache (vd: ổ đĩa chỉ đọc) thì bỏ qua
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    
+    with _cv_cache_sweep_lock:
+        if time() - _cv_cache_swept_at < CV_CACHE_SWEEP_INTERVAL:
+            return
+        _cv_cache_swept_at = time()
+    _sweep_cv_cache()
+
 def extract_text_from_cv_url(url):
-    """Trích xuất text từ CV URL bằng pdfplumber hoặc python-docx"""
+    """Trích xuất text từ CV URL bằng PyMuPDF/pypdfium2/pdfplumber hoặc python-docx (có cache trên đĩa)"""
     if not url:
         return None
     
+    cached_text = _read_cv_cache(url)
+    if cached_text is not None:
+        return cached_text
+    
+    text = _extract_text_from_cv_url_uncached(url)
+    if text:
+        _write_cv_cache(url, text)
+    return text
+
+def _extract_text_from_cv_url_uncached(url):
+    """Tải và trích xuất text từ CV URL (không qua cache)"""
     try:
         # Detect extension from URL
         url_low = url.lower().split('?')[0]
@@ -410,7 +731,108 @@ def extract_text_from_cv_url(url):
     except Exception:
         return None
 
-def find_opening_id_by_name(query_name, api_key, similarity_threshold=0.5):
+@lru_cache(maxsize=None)
+def _load_sklearn():
+    """Import sklearn ở lần dùng đầu tiên thay vì lúc khởi động (chỉ cần cho fallback khi không có RapidFuzz)"""
+    from sklearn.feature_extraction import text as sklearn_text
+    return sklearn_text
+
+def get_fitted_vectorizer(cache_name, key, names):
+    """Lấy (vectorizer, matrix) đã fit cho danh sách names, dùng lại nếu key không đổi và còn trong CACHE_TTL"""
+    current_time = time()
+    cached = _cache[cache_name]
+    if cached['data'] is not None and current_time - cached['timestamp'] < CACHE_TTL:
+        cached_key, vectorizer, matrix = cached['data']
+        if cached_key == key:
+            return vectorizer, matrix
+    
+    vectorizer = _load_sklearn().TfidfVectorizer()
+    matrix = vectorizer.fit_transform(names)
+    _cache[cache_name] = {'data': (key, vectorizer, matrix), 'timestamp': current_time}
+    return vectorizer, matrix
+
+@lru_cache(maxsize=1024)
+def parse_iso_date(value):
+    """Parse chuỗi 'YYYY-MM-DD' thành date (có cache, raise ValueError nếu sai định dạng)"""
+    # date.fromisoformat (C) cho chuỗi 10 ký tự chuẩn; strptime chỉ còn cho dạng không đệm số 0 (vd '2024-1-5')
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+@lru_cache(maxsize=10000)
+def normalize_name(text):
+    """casefold + bỏ dấu tiếng Việt (đ -> d) để so khớp tên không phân biệt hoa thường/dấu (có cache)"""
+    text = unicodedata.normalize('NFD', text.casefold().replace('đ', 'd'))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+# Ngưỡng similarity theo thang của scorer đang dùng: RapidFuzz (0-1) chặt hơn nhiều so với TF-IDF cosine
+# (vd "Offered"/"Hired" = 0.50, "nguyen van an"/"nguyen van binh" = 0.86 theo thang RapidFuzz)
+if RAPIDFUZZ_AVAILABLE:
+    NAME_MATCH_THRESHOLD = 0.95
+    TITLE_MATCH_THRESHOLD = 0.9
+    STAGE_MATCH_THRESHOLD = 0.8
+else:
+    NAME_MATCH_THRESHOLD = 0.5
+    TITLE_MATCH_THRESHOLD = 0.5
+    STAGE_MATCH_THRESHOLD = 0.3
+
+def best_name_match(query, names, cache_name=None, key=None):
+    """Tìm tên opening/stage gần nhất với query: RapidFuzz WRatio nếu có, fallback TF-IDF cosine. Trả về (index, similarity 0-1)
+    
+    cache_name/key: nếu có, fallback TF-IDF dùng lại vectorizer đã fit qua get_fitted_vectorizer.
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        _, score, best_idx = fuzz_process.extractOne(
+            normalize_name(query), [normalize_name(name) for name in names], scorer=fuzz.WRatio
+        )
+        return best_idx, score / 100.0
+    if cache_name is not None:
+        vectorizer, name_vectors = get_fitted_vectorizer(cache_name, key, names)
+    else:
+        vectorizer = _load_sklearn().TfidfVectorizer()
+        name_vectors = vectorizer.fit_transform(names)
+    # TF-IDF đã chuẩn hóa L2 nên cosine similarity chính là tích vô hướng (không cần import sklearn.metrics/numpy)
+    similarities = (name_vectors @ vectorizer.transform([query]).T).toarray().ravel()
+    best_idx = int(similarities.argmax())
+    return best_idx, float(similarities[best_idx])
+
+def best_name_matches(queries, names):
+    """Tìm tên ứng viên gần nhất cho nhiều query trên cùng danh sách names: chuẩn hóa/fit names một lần. Trả về list (index, similarity 0-1)
+    
+    Tên người dùng token_sort_ratio: một phần của tên (vd "le minh" trong "le minh tuan") không được tính là khớp hoàn toàn.
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        normalized_names = [normalize_name(name) for name in names]
+        results = []
+        for query in queries:
+            _, score, best_idx = fuzz_process.extractOne(normalize_name(query), normalized_names, scorer=fuzz.token_sort_ratio)
+            results.append((best_idx, score / 100.0))
+        return results
+    vectorizer = _load_sklearn().TfidfVectorizer()
+    name_vectors = vectorizer.fit_transform(names)
+    # Một phép nhân ma trận cho cả lô query (TF-IDF đã chuẩn hóa L2 nên tích vô hướng là cosine)
+    similarities = (vectorizer.transform(queries) @ name_vectors.T).toarray()
+    best_indices = similarities.argmax(axis=1)
+    return [(int(best_idx), float(similarities[row, best_idx])) for row, best_idx in enumerate(best_indices)]
+
+def get_openings_index(openings):
+    """Index {'by_id', 'by_name'} cho danh sách openings (dựng lại khi get_base_openings trả về list mới)"""
+    index = _cache['openings_index']
+    if index['source'] is not openings:
+        by_id = {}
+        by_name = {}
+        for op in openings:
+            # setdefault: trùng tên thì giữ opening xuất hiện trước như khi duyệt tuần tự
+            by_id.setdefault(op['id'], op)
+            by_name.setdefault(op['name'], op)
+        index = {'source': openings, 'by_id': by_id, 'by_name': by_name}
+        _cache['openings_index'] = index
+    return index
+
+def find_opening_id_by_name(query_name, api_key, similarity_threshold=TITLE_MATCH_THRESHOLD):
     """Tìm opening_id gần nhất với query_name bằng cosine similarity"""
     openings = get_base_openings(api_key, use_cache=True)
     
@@ -418,7 +840,8 @@ def find_opening_id_by_name(query_name, api_key, similarity_threshold=0.5):
         return None, None, 0.0
     
     # Nếu tìm thấy chính xác theo id hoặc name
-    exact_match = next((op for op in openings if op['id'] == query_name or op['name'] == query_name), None)
+    index = get_openings_index(openings)
+    exact_match = index['by_id'].get(query_name) or index['by_name'].get(query_name)
     if exact_match:
         return exact_match['id'], exact_match['name'], 1.0
     
@@ -428,33 +851,36 @@ def find_opening_id_by_name(query_name, api_key, similarity_threshold=0.5):
     if not opening_names:
         return None, None, 0.0
     
-    # Vectorize các tên opening
-    vectorizer = TfidfVectorizer()
     try:
-        name_vectors = vectorizer.fit_transform(opening_names)
-        query_vector = vectorizer.transform([query_name])
-        
-        # Tính cosine similarity
-        similarities = cosine_similarity(query_vector, name_vectors).flatten()
-        
-        # Tìm index có similarity cao nhất
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
+        # Tìm tên gần nhất (fallback TF-IDF dùng lại fit nếu danh sách openings không đổi)
+        best_idx, best_similarity = best_name_match(
+            query_name, opening_names, 'opening_vectorizer', tuple(op['id'] for op in openings)
+        )
         
         # Nếu similarity >= threshold, trả về opening đó
         if best_similarity >= similarity_threshold:
             best_opening = openings[best_idx]
-            return best_opening['id'], best_opening['name'], float(best_similarity)
+            return best_opening['id'], best_opening['name'], best_similarity
         else:
-            return None, None, float(best_similarity)
+            return None, None, best_similarity
     except Exception:
-        # Nếu có lỗi trong vectorization, trả về None
+        # Nếu có lỗi khi so khớp, trả về None
         return None, None, 0.0
 
-def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, similarity_threshold=0.5, filter_stages=None):
+def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, similarity_threshold=NAME_MATCH_THRESHOLD, filter_stages=None):
     """Tìm candidate_id dựa trên tên ứng viên trong một opening cụ thể bằng cosine similarity."""
     if not candidate_name or not opening_id:
         return None, 0.0
+    return find_candidates_by_names_in_opening(
+        [candidate_name], opening_id, api_key, similarity_threshold, filter_stages
+    )[0]
+
+def find_candidates_by_names_in_opening(candidate_names, opening_id, api_key, similarity_threshold=NAME_MATCH_THRESHOLD, filter_stages=None):
+    """Như find_candidate_by_name_in_opening cho nhiều tên: tải danh sách candidates một lần, so khớp cả lô.
+    Trả về list (candidate_id, similarity) theo đúng thứ tự candidate_names."""
+    not_found = [(None, 0.0)] * len(candidate_names)
+    if not candidate_names or not opening_id:
+        return not_found
     
     # Lấy danh sách candidates của opening đó
     url = "https://hiring.base.vn/publicapi/v2/candidate/list"
@@ -465,14 +891,14 @@ def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, simil
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
-        return None, 0.0
+        return not_found
     
-    data = response.json()
+    data = _json_loads(response.content)
     if 'candidates' not in data or not data['candidates']:
-        return None, 0.0
+        return not_found
     
     # Lọc theo stage nếu có filter_stages
     if filter_stages:
@@ -483,42 +909,50 @@ def find_candidate_by_name_in_opening(candidate_name, opening_id, api_key, simil
                 filtered_candidates.append(candidate)
         
         if not filtered_candidates:
-            return None, 0.0
+            return not_found
     else:
         # Không lọc stage, lấy tất cả candidates
         filtered_candidates = data['candidates']
     
     # Tìm candidate bằng tên với cosine similarity trong danh sách đã lọc
-    candidate_names = [c.get('name', '') for c in filtered_candidates if c.get('name')]
+    candidates_with_names = [c for c in filtered_candidates if c.get('name')]
+    names = [c['name'] for c in candidates_with_names]
     
-    if not candidate_names:
-        return None, 0.0
+    if not names:
+        return not_found
     
-    # Kiểm tra exact match trước
-    exact_match = next((c for c in filtered_candidates if c.get('name') == candidate_name), None)
-    if exact_match:
-        return exact_match.get('id'), 1.0
+    # Kiểm tra exact match trước (giữ candidate xuất hiện đầu tiên như khi duyệt tuần tự)
+    exact_by_name = {}
+    for c in candidates_with_names:
+        exact_by_name.setdefault(c['name'], c)
     
-    # Dùng cosine similarity để tìm candidate name gần nhất
+    results = list(not_found)
+    fuzzy_positions = []
+    for pos, candidate_name in enumerate(candidate_names):
+        if not candidate_name:
+            continue
+        exact_match = exact_by_name.get(candidate_name)
+        if exact_match:
+            results[pos] = (exact_match.get('id'), 1.0)
+        else:
+            fuzzy_positions.append(pos)
+    
+    if not fuzzy_positions:
+        return results
+    
+    # Tìm candidate name gần nhất cho tất cả tên còn lại trong một lượt
     try:
-        vectorizer = TfidfVectorizer()
-        name_vectors = vectorizer.fit_transform(candidate_names)
-        query_vector = vectorizer.transform([candidate_name])
-        
-        similarities = cosine_similarity(query_vector, name_vectors).flatten()
-        best_idx = np.argmax(similarities)
-        best_similarity = similarities[best_idx]
-        
+        matches = best_name_matches([candidate_names[pos] for pos in fuzzy_positions], names)
+    except Exception:
+        return results
+    
+    for pos, (best_idx, best_similarity) in zip(fuzzy_positions, matches):
         # Nếu similarity >= threshold, trả về candidate đó
         if best_similarity >= similarity_threshold:
-            candidates_with_names = [c for c in filtered_candidates if c.get('name')]
-            if best_idx < len(candidates_with_names):
-                best_candidate = candidates_with_names[best_idx]
-                return best_candidate.get('id'), float(best_similarity)
-        
-        return None, float(best_similarity)
-    except Exception:
-        return None, 0.0
+            results[pos] = (candidates_with_names[best_idx].get('id'), best_similarity)
+        else:
+            results[pos] = (None, best_similarity)
+    return results
 
 def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=None, stage_name=None):
     """Truy xuất ứng viên cho một vị trí tuyển dụng cụ thể trong khoảng thời gian (luôn có cv_text)"""
@@ -537,22 +971,23 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise Exception(f"Lỗi kết nối đến Base API khi lấy ứng viên: {e}")
 
-    data = response.json()
+    data = _json_loads(response.content)
     if 'candidates' in data and data['candidates']:
         # Nếu có stage_name, tìm các stage name phù hợp bằng cosine similarity
         matching_stage_names = None
         if stage_name is not None:
             # Thu thập tất cả stage_name unique từ candidates
-            all_stage_names = list(set([
+            # Sắp xếp để thứ tự ổn định, dùng lại được TF-IDF đã fit
+            all_stage_names = sorted(set(
                 candidate.get('stage_name', '') 
                 for candidate in data['candidates'] 
                 if candidate.get('stage_name')
-            ]))
+            ))
             
             if not all_stage_names:
                 # Nếu không có stage_name nào, lấy tất cả
@@ -562,69 +997,69 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
                 if stage_name in all_stage_names:
                     matching_stage_names = [stage_name]
                 else:
-                    # Dùng cosine similarity để tìm stage name gần nhất
+                    # Tìm stage name gần nhất
                     try:
-                        vectorizer = TfidfVectorizer()
-                        stage_vectors = vectorizer.fit_transform(all_stage_names)
-                        query_vector = vectorizer.transform([stage_name])
+                        best_idx, best_similarity = best_name_match(
+                            stage_name, all_stage_names, 'stage_vectorizer', tuple(all_stage_names)
+                        )
                         
-                        similarities = cosine_similarity(query_vector, stage_vectors).flatten()
-                        best_idx = np.argmax(similarities)
-                        best_similarity = similarities[best_idx]
-                        
-                        # Nếu similarity >= 0.3, lấy stage name đó (ngưỡng thấp để bao quát hơn)
-                        if best_similarity >= 0.3:
+                        # Nếu similarity >= STAGE_MATCH_THRESHOLD, lấy stage name đó
+                        if best_similarity >= STAGE_MATCH_THRESHOLD:
                             matching_stage_names = [all_stage_names[best_idx]]
                         else:
                             # Nếu không tìm thấy gì phù hợp, lấy tất cả
                             matching_stage_names = None
                     except Exception:
-                        # Nếu có lỗi trong vectorization, lấy tất cả
+                        # Nếu có lỗi khi so khớp, lấy tất cả
                         matching_stage_names = None
         
         # Bước 1: Lọc ứng viên theo stage_name trước (chưa trích xuất cv_text để tiết kiệm request)
-        filtered_candidates = []
-        for candidate in data['candidates']:
-            # Lọc theo stage_name nếu có matching_stage_names
-            if matching_stage_names is not None:
-                candidate_stage_name = candidate.get('stage_name', '')
-                if candidate_stage_name not in matching_stage_names:
-                    continue
-            
-            filtered_candidates.append(candidate)
+        if matching_stage_names is not None:
+            matching_stage_set = frozenset(matching_stage_names)
+            filtered_candidates = [
+                c for c in data['candidates']
+                if c.get('stage_name', '') in matching_stage_set
+            ]
+        else:
+            filtered_candidates = data['candidates']
         
         # Nếu số lượng ứng viên lọc được > 10, chỉ lấy những người cập nhật trong vòng 7 ngày gần đây
         if len(filtered_candidates) > 10:
-            from datetime import timedelta
             seven_days_ago_ts = int((datetime.now() - timedelta(days=7)).timestamp())
             filtered_candidates = [
                 c for c in filtered_candidates 
                 if int(c.get('last_update', 0)) >= seven_days_ago_ts
             ]
         
-        # Bước 2: Trích xuất cv_text chỉ cho các ứng viên đã được lọc
-        candidates = []
+        # Bước 2: Trích xuất cv_text chỉ cho các ứng viên đã được lọc (tiết kiệm request Gemini)
+        cv_url_list = []
         for candidate in filtered_candidates:
             cv_urls = candidate.get('cvs', [])
-            cv_url = cv_urls[0] if isinstance(cv_urls, list) and len(cv_urls) > 0 else None
-            
-            # Chỉ trích xuất cv_text từ CV URL sau khi đã lọc xong (tiết kiệm request Gemini)
-            cv_text = None
-            if cv_url:
-                cv_text = extract_text_from_cv_url(cv_url)
+            cv_url_list.append(cv_urls[0] if isinstance(cv_urls, list) and len(cv_urls) > 0 else None)
+        
+        # Tải + trích xuất các CV song song (chủ yếu chờ I/O mạng)
+        urls_to_extract = list(dict.fromkeys(url for url in cv_url_list if url))
+        cv_text_by_url = {}
+        if urls_to_extract:
+            workers = min(CV_EXTRACT_WORKERS, len(urls_to_extract))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                cv_text_by_url = dict(zip(urls_to_extract, executor.map(extract_text_from_cv_url, urls_to_extract)))
+        
+        candidates = []
+        for candidate, cv_url in zip(filtered_candidates, cv_url_list):
+            cv_text = cv_text_by_url.get(cv_url) if cv_url else None
             
             # Xử lý evaluations để lấy reviews chi tiết
             reviews = process_evaluations(candidate.get('evaluations', []))
             # Giữ lại review cũ (text đơn giản) để tương thích ngược
             review = extract_message(candidate.get('evaluations', []))
             
-            form_data = {}
-            if 'form' in candidate and isinstance(candidate['form'], list):
-                for item in candidate['form']:
-                    if isinstance(item, dict) and 'id' in item and 'value' in item:
-                        form_data[item['id']] = item['value']
-            
-
+            form = candidate.get('form')
+            form_data = {
+                item['id']: item['value']
+                for item in form
+                if isinstance(item, dict) and 'id' in item and 'value' in item
+            } if isinstance(form, list) else {}
             
             # Chuyển đổi last_update sang HCM timezone
             last_update_hcm = None
@@ -632,8 +1067,7 @@ def get_candidates_for_opening(opening_id, api_key, start_date=None, end_date=No
             if last_update_ts:
                 try:
                     timestamp = int(last_update_ts)
-                    dt = datetime.fromtimestamp(timestamp, tz=timezone('UTC'))
-                    dt_hcm = dt.astimezone(timezone('Asia/Ho_Chi_Minh'))
+                    dt_hcm = datetime.fromtimestamp(timestamp, HCM_TZ)
                     last_update_hcm = dt_hcm.isoformat()
                 except (ValueError, TypeError, OSError):
                     pass
@@ -674,12 +1108,12 @@ def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, fil
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise Exception(f"Lỗi kết nối đến Base API khi lấy lịch phỏng vấn: {e}")
 
-    data = response.json()
+    data = _json_loads(response.content)
     if 'interviews' in data and data['interviews']:
         interviews = data['interviews']
         
@@ -692,15 +1126,13 @@ def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, fil
         
         # Xử lý và chỉ lấy các trường quan trọng
         processed_interviews = []
-        hcm_tz = timezone('Asia/Ho_Chi_Minh')
-        
         # Chuyển đổi start_date và end_date thành date objects nếu có
         start_date_obj = None
         end_date_obj = None
         if start_date:
-            start_date_obj = start_date if isinstance(start_date, date) else datetime.strptime(start_date, "%Y-%m-%d").date()
+            start_date_obj = start_date if isinstance(start_date, date) else parse_iso_date(start_date)
         if end_date:
-            end_date_obj = end_date if isinstance(end_date, date) else datetime.strptime(end_date, "%Y-%m-%d").date()
+            end_date_obj = end_date if isinstance(end_date, date) else parse_iso_date(end_date)
         
         for interview in interviews:
             # Chỉ lấy các trường quan trọng
@@ -717,8 +1149,7 @@ def get_interviews(api_key, start_date=None, end_date=None, opening_id=None, fil
             if 'time' in interview and interview.get('time'):
                 try:
                     timestamp = int(interview['time'])
-                    dt = datetime.fromtimestamp(timestamp, tz=timezone('UTC'))
-                    dt_hcm = dt.astimezone(hcm_tz)
+                    dt_hcm = datetime.fromtimestamp(timestamp, HCM_TZ)
                     processed_interview['time_dt'] = dt_hcm.isoformat()
                     time_dt_date = dt_hcm.date()  # Lấy date để lọc
                 except (ValueError, TypeError, OSError):
@@ -758,10 +1189,10 @@ def get_opening_stages(opening_id, api_key):
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
         
-        result = response.json()
+        result = _json_loads(response.content)
         
         # Trích xuất danh sách stages từ opening.stats.stages
         stages_list = result.get('opening', {}).get('stats', {}).get('stages', [])
@@ -787,10 +1218,10 @@ def get_opening_content(opening_id, api_key):
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
         
-        result = response.json()
+        result = _json_loads(response.content)
         
         # Trích xuất content (JD)
         content = result.get('opening', {}).get('content')
@@ -804,8 +1235,24 @@ def get_opening_content(opening_id, api_key):
     except Exception:
         return None
 
-def get_candidate_details(candidate_id, api_key):
-    """Lấy và xử lý dữ liệu chi tiết ứng viên từ API Base.vn, trả về JSON phẳng"""
+def get_interview_opening_index(api_key, use_cache=True):
+    """Map candidate_id (str) -> opening_name từ toàn bộ lịch phỏng vấn (có cache, chỉ một lần tải khi nhiều thread cùng cần)"""
+    def load():
+        index = {}
+        for interview in get_interviews(api_key):
+            interview_opening_name = interview.get('opening_name')
+            if interview_opening_name:
+                # setdefault: giữ interview xuất hiện trước như khi duyệt tuần tự
+                index.setdefault(str(interview.get('candidate_id')), interview_opening_name)
+        return index
+    
+    return _get_or_refresh('interview_index', lambda: _single_flight(('interview_index', api_key), load), use_cache)
+
+def get_candidate_details(candidate_id, api_key, interview_index=None):
+    """Lấy và xử lý dữ liệu chi tiết ứng viên từ API Base.vn, trả về JSON phẳng
+    
+    interview_index: map candidate_id -> opening_name dựng sẵn (nếu có); mặc định dùng get_interview_opening_index.
+    """
     url = "https://hiring.base.vn/publicapi/v2/candidate/get"
     
     payload = {
@@ -815,12 +1262,12 @@ def get_candidate_details(candidate_id, api_key):
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = _SESSION.post(url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise Exception(f"Lỗi kết nối đến Base API khi lấy chi tiết ứng viên: {e}")
     
-    raw_response = response.json()
+    raw_response = _json_loads(response.content)
     
     # Kiểm tra API có trả về lỗi logic không (vd: 'code': 1 là thành công)
     if raw_response.get('code') != 1 or not raw_response.get('candidate'):
@@ -830,14 +1277,13 @@ def get_candidate_details(candidate_id, api_key):
     candidate_data = raw_response.get('candidate', {})
     
     # Hàm trợ giúp để "làm phẳng" các danh sách lồng nhau
-    def flatten_fields(field_list):
-        """Chuyển đổi danh sách [{'id': 'key1', 'value': 'val1'}, ...] thành {'key1': 'val1', ...}"""
-        flat_dict = {}
-        if isinstance(field_list, list):
-            for item in field_list:
-                if isinstance(item, dict) and 'id' in item:
-                    flat_dict[item['id']] = item.get('value')
-        return flat_dict
+    def merge_fields(target, *field_lists):
+        """Ghi thẳng các danh sách [{'id': 'key1', 'value': 'val1'}, ...] vào target dạng {'key1': 'val1', ...} (theo thứ tự, sau đè trước)"""
+        for field_list in field_lists:
+            if isinstance(field_list, list):
+                for item in field_list:
+                    if isinstance(item, dict) and 'id' in item:
+                        target[item['id']] = item.get('value')
     
     # Bắt đầu với các trường dữ liệu chính
     # Lấy opening info từ nhiều nguồn để đảm bảo có dữ liệu
@@ -858,18 +1304,10 @@ def get_candidate_details(candidate_id, api_key):
     # Nếu không có opening_name, thử tìm trong lịch phỏng vấn gần đây (fallback)
     if not opening_name:
         try:
-            # Lấy danh sách interview (mặc định là gần đây)
-            # Hàm get_interviews được định nghĩa sau, nhưng sẽ có sẵn khi hàm này được gọi
-            interviews = get_interviews(api_key)
-            
-            # Tìm interview của candidate này
-            candidate_id_str = str(candidate_data.get('id'))
-            for interview in interviews:
-                if str(interview.get('candidate_id')) == candidate_id_str:
-                    interview_opening_name = interview.get('opening_name')
-                    if interview_opening_name:
-                        opening_name = interview_opening_name
-                        break
+            # Tra index candidate_id -> opening_name thay vì tải và duyệt lại toàn bộ lịch phỏng vấn cho mỗi ứng viên
+            if interview_index is None:
+                interview_index = get_interview_opening_index(api_key)
+            opening_name = interview_index.get(str(candidate_data.get('id')))
         except Exception:
             pass
             
@@ -892,6 +1330,7 @@ def get_candidate_details(candidate_id, api_key):
         except:
             pass
     
+    cvs = candidate_data.get('cvs')
     refined_data = {
         'id': candidate_data.get('id'),
         'ten': candidate_data.get('name'),
@@ -913,16 +1352,12 @@ def get_candidate_details(candidate_id, api_key):
         'gioi_tinh': candidate_data.get('gender_text'),
         'dia_chi_hien_tai': candidate_data.get('address'),
         'cccd': candidate_data.get('ssn'),
-        'cv_url': (candidate_data.get('cvs') or [None])[0]
+        'cv_url': cvs[0] if cvs else None
     }
     
     # Xử lý và gộp dữ liệu từ 'fields' và 'form'
-    field_data = flatten_fields(candidate_data.get('fields', []))
-    form_data = flatten_fields(candidate_data.get('form', []))
-    
-    # Cập nhật vào dict chính
-    refined_data.update(field_data)
-    refined_data.update(form_data)
+    # Cập nhật fields và form vào dict chính trong một lượt
+    merge_fields(refined_data, candidate_data.get('fields', []), candidate_data.get('form', []))
     
     # Xử lý evaluations để lấy reviews chi tiết
     reviews = process_evaluations(candidate_data.get('evaluations', []))
@@ -952,7 +1387,7 @@ async def get_job_description(ctx: Context, opening_name_or_id: Optional[str] =
         await ctx.info(f"Getting job description for: {opening_name_or_id}")
 
         # Lấy danh sách openings có status 10 (chỉ id và name)
-        openings = get_base_openings(BASE_API_KEY, use_cache=True)
+        openings = await asyncio.to_thread(get_base_openings, BASE_API_KEY, use_cache=True)
         
         # Nếu không có opening_name_or_id, trả về tất cả các opening có status 10 (chỉ id và name)
         if not opening_name_or_id:
@@ -965,7 +1400,8 @@ async def get_job_description(ctx: Context, opening_name_or_id: Optional[str] =
             }
         
         # Tìm opening_id từ name hoặc id bằng cosine similarity
-        opening_id, matched_name, similarity_score = find_opening_id_by_name(
+        opening_id, matched_name, similarity_score = await asyncio.to_thread(
+            find_opening_id_by_name,
             opening_name_or_id, 
             BASE_API_KEY
         )
@@ -982,13 +1418,7 @@ async def get_job_description(ctx: Context, opening_name_or_id: Optional[str] =
             }
         
         # Lấy JD (Job Description) để tìm JD cụ thể
-        jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-        jd = next((jd for jd in jds if jd['id'] == opening_id), None)
-        
-        if not jd:
-            # Thử làm mới cache nếu không tìm thấy
-            jds = get_job_descriptions(BASE_API_KEY, use_cache=False)
-            jd = next((jd for jd in jds if jd['id'] == opening_id), None)
+        jd = await asyncio.to_thread(get_job_description_by_id, opening_id, BASE_API_KEY)
         
         # Nếu vẫn không tìm thấy JD cụ thể, trả về tất cả các opening có status 10 (chỉ id và name)
         if not jd:
@@ -1004,7 +1434,7 @@ async def get_job_description(ctx: Context, opening_name_or_id: Optional[str] =
             }
         
         # Lấy danh sách stages cho opening này
-        stages = get_opening_stages(opening_id, BASE_API_KEY)
+        stages = await asyncio.to_thread(get_opening_stages, opening_id, BASE_API_KEY)
         
         return {
             "success": True,
@@ -1046,15 +1476,16 @@ async def get_candidates_by_opening(
 
         start_date_obj, end_date_obj = None, None
         if start_date:
-            start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
+            start_date_obj = parse_iso_date(start_date)
         if end_date:
-            end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
+            end_date_obj = parse_iso_date(end_date)
         
         if start_date_obj and end_date_obj and start_date_obj > end_date_obj:
             raise ValueError("Ngày kết thúc phải sau ngày bắt đầu")
         
         # Tìm opening_id từ name hoặc id bằng cosine similarity
-        opening_id, matched_name, similarity_score = find_opening_id_by_name(
+        opening_id, matched_name, similarity_score = await asyncio.to_thread(
+            find_opening_id_by_name,
             opening_name_or_id, 
             BASE_API_KEY
         )
@@ -1062,16 +1493,10 @@ async def get_candidates_by_opening(
         if not opening_id:
             raise Exception(f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'. Similarity score cao nhất: {similarity_score:.2f}")
         
-        candidates = get_candidates_for_opening(opening_id, BASE_API_KEY, start_date_obj, end_date_obj, stage_name)
+        candidates = await asyncio.to_thread(get_candidates_for_opening, opening_id, BASE_API_KEY, start_date_obj, end_date_obj, stage_name)
         
         # Lấy JD (Job Description)
-        jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-        jd = next((jd for jd in jds if jd['id'] == opening_id), None)
-        
-        if not jd:
-            # Thử làm mới cache nếu không tìm thấy
-            jds = get_job_descriptions(BASE_API_KEY, use_cache=False)
-            jd = next((jd for jd in jds if jd['id'] == opening_id), None)
+        jd = await asyncio.to_thread(get_job_description_by_id, opening_id, BASE_API_KEY)
         
         job_description = jd['job_description'] if jd else None
         
@@ -1120,7 +1545,7 @@ async def get_interviews_by_opening(
         
         # Nếu có tham số date, dùng nó để lọc dựa trên time_dt
         if date:
-            filter_date_obj = datetime.strptime(date, "%Y-%m-%d").date()
+            filter_date_obj = parse_iso_date(date)
         
         opening_id = None
         matched_name = None
@@ -1128,7 +1553,8 @@ async def get_interviews_by_opening(
         
         # Nếu có opening_name_or_id, tìm opening_id bằng cosine similarity
         if opening_name_or_id:
-            opening_id, matched_name, similarity_score = find_opening_id_by_name(
+            opening_id, matched_name, similarity_score = await asyncio.to_thread(
+                find_opening_id_by_name,
                 opening_name_or_id,
                 BASE_API_KEY
             )
@@ -1139,7 +1565,8 @@ async def get_interviews_by_opening(
         
         # Lấy tất cả interviews và lọc dựa trên date của time_dt
         # Nếu có date, dùng filter_date; nếu không thì dùng start_date và end_date
-        interviews = get_interviews(
+        interviews = await asyncio.to_thread(
+            get_interviews,
             BASE_API_KEY, 
             start_date=start_date if not date else None,
             end_date=end_date if not date else None,
@@ -1213,7 +1640,8 @@ async def get_candidate_details_tool(
         opening_similarity = None
         
         if opening_name_or_id:
-            opening_id, opening_name_matched, opening_similarity = find_opening_id_by_name(
+            opening_id, opening_name_matched, opening_similarity = await asyncio.to_thread(
+                find_opening_id_by_name,
                 opening_name_or_id,
                 BASE_API_KEY
             )
@@ -1223,87 +1651,91 @@ async def get_candidate_details_tool(
         
         # Tìm candidate IDs từ candidate names nếu có
         if candidate_names and opening_id:
-            for name in candidate_names:
-                found_id, similarity = find_candidate_by_name_in_opening(
-                    name,
-                    opening_id,
-                    BASE_API_KEY,
-                    similarity_threshold=0.5,
-                    filter_stages=None
-                )
-                
-                if found_id:
-                    candidate_ids.append(found_id)
+            # Tải danh sách candidates của opening một lần rồi so khớp tất cả tên
+            name_matches = await asyncio.to_thread(
+                find_candidates_by_names_in_opening,
+                candidate_names,
+                opening_id,
+                BASE_API_KEY,
+                similarity_threshold=NAME_MATCH_THRESHOLD,
+                filter_stages=None
+            )
+            candidate_ids.extend(found_id for found_id, _ in name_matches if found_id)
         
         if not candidate_ids:
             raise Exception("Không tìm thấy ứng viên nào phù hợp")
         
-        # Lấy thông tin chi tiết cho tất cả candidates
-        all_candidates_data = []
-        for cid in candidate_ids:
-            try:
-                candidate_data = get_candidate_details(cid, BASE_API_KEY)
-                
-                # Trích xuất cv_text từ cv_url nếu có
-                cv_url = candidate_data.get('cv_url')
-                if cv_url:
-                    cv_text = extract_text_from_cv_url(cv_url)
-                    candidate_data['cv_text'] = cv_text
-                
-
-                
-                all_candidates_data.append(candidate_data)
-            except Exception as e:
-                # Nếu lỗi với một candidate, bỏ qua và tiếp tục
-                continue
+        # Lấy thông tin chi tiết cho tất cả candidates song song (mỗi request chạy trong thread, dùng chung session)
+        details_results = await asyncio.gather(
+            *[asyncio.to_thread(get_candidate_details, cid, BASE_API_KEY) for cid in candidate_ids],
+            return_exceptions=True
+        )
+        # Nếu lỗi với một candidate, bỏ qua và tiếp tục
+        all_candidates_data = [r for r in details_results if not isinstance(r, BaseException)]
+        
+        # Trích xuất cv_text từ cv_url nếu có (song song trên _CV_POOL)
+        candidates_with_cv = [c for c in all_candidates_data if c.get('cv_url')]
+        if candidates_with_cv:
+            loop = asyncio.get_running_loop()
+            cv_texts = await asyncio.gather(
+                *[loop.run_in_executor(_CV_POOL, extract_text_from_cv_url, c['cv_url']) for c in candidates_with_cv]
+            )
+            for candidate_data, cv_text in zip(candidates_with_cv, cv_texts):
+                candidate_data['cv_text'] = cv_text
         
         if not all_candidates_data:
             raise Exception("Không thể lấy thông tin chi tiết cho bất kỳ ứng viên nào")
         
         # Nhóm candidates theo opening_id
-        openings_map = {}
+        openings_map = defaultdict(lambda: {
+            'opening_id': None,
+            'opening_name': None,
+            'job_description': None,
+            'candidates': []
+        })
+        opening_id_by_name = {}  # opening_name -> opening_id, mỗi tên chỉ so khớp một lần trong lượt gọi này
         for candidate_data in all_candidates_data:
             cand_opening_id = candidate_data.get('opening_id')
             cand_opening_name = candidate_data.get('vi_tri_ung_tuyen')
             
             # Tìm opening_id nếu chỉ có opening_name
             if not cand_opening_id and cand_opening_name:
-                cand_opening_id, _, _ = find_opening_id_by_name(
-                    cand_opening_name,
-                    BASE_API_KEY
-                )
+                if cand_opening_name not in opening_id_by_name:
+                    opening_id_by_name[cand_opening_name], _, _ = await asyncio.to_thread(
+                        find_opening_id_by_name,
+                        cand_opening_name,
+                        BASE_API_KEY
+                    )
+                cand_opening_id = opening_id_by_name[cand_opening_name]
             
             # Sử dụng opening_id hoặc opening_name làm key
             opening_key = cand_opening_id or cand_opening_name or "unknown"
             
-            if opening_key not in openings_map:
-                openings_map[opening_key] = {
-                    'opening_id': cand_opening_id,
-                    'opening_name': cand_opening_name,
-                    'job_description': None,
-                    'candidates': []
-                }
+            opening_entry = openings_map[opening_key]
+            if not opening_entry['candidates']:
+                # Opening mới: lấy id/tên từ candidate đầu tiên của nhóm
+                opening_entry['opening_id'] = cand_opening_id
+                opening_entry['opening_name'] = cand_opening_name
             
-            # Xóa các trường thừa khỏi candidate_data để đúng format README
-            candidate_data_cleaned = {
-                k: v for k, v in candidate_data.items() 
-                if k not in ['job_description', 'opening_id', 'vi_tri_ung_tuyen']
-            }
-            openings_map[opening_key]['candidates'].append(candidate_data_cleaned)
+            # Xóa các trường thừa khỏi candidate_data để đúng format README (sửa tại chỗ, dict do get_candidate_details tạo mới)
+            for k in ('job_description', 'opening_id', 'vi_tri_ung_tuyen'):
+                candidate_data.pop(k, None)
+            opening_entry['candidates'].append(candidate_data)
         
         # Lấy JD cho mỗi opening
+        jd_by_id = None  # id -> JD từ cache cũ, chỉ lấy khi cần fallback
         for opening_key, opening_data in openings_map.items():
             if opening_data['opening_id']:
                 # Dùng hàm get_opening_content mới để lấy JD chính xác theo ID
-                jd_content = get_opening_content(opening_data['opening_id'], BASE_API_KEY)
+                jd_content = await asyncio.to_thread(get_opening_content, opening_data['opening_id'], BASE_API_KEY)
+                if not jd_content:
+                    # Nếu không tìm thấy JD, thử tìm trong cache cũ (fallback)
+                    if jd_by_id is None:
+                        jd_by_id = await asyncio.to_thread(get_job_descriptions_indexed, BASE_API_KEY, use_cache=True)
+                    jd = jd_by_id.get(opening_data['opening_id'])
+                    jd_content = jd['job_description'] if jd else None
                 if jd_content:
                     opening_data['job_description'] = jd_content
-                else:
-                    # Nếu không tìm thấy JD, thử tìm trong cache cũ (fallback)
-                    jds = get_job_descriptions(BASE_API_KEY, use_cache=True)
-                    jd = next((jd for jd in jds if jd['id'] == opening_data['opening_id']), None)
-                    if jd:
-                        opening_data['job_description'] = jd['job_description']
         
         # Chuyển đổi sang list để dễ đọc hơn
         openings_list = list(openings_map.values())
@@ -1355,7 +1787,8 @@ async def get_offer_letter_tool(
                 raise Exception("Phải cung cấp candidate_id, hoặc cả opening_name_or_id và candidate_name")
             
             # Tìm opening_id
-            opening_id, opening_name_matched, opening_similarity = find_opening_id_by_name(
+            opening_id, opening_name_matched, opening_similarity = await asyncio.to_thread(
+                find_opening_id_by_name,
                 opening_name_or_id,
                 BASE_API_KEY
             )
@@ -1364,18 +1797,19 @@ async def get_offer_letter_tool(
                 raise Exception(f"Không tìm thấy vị trí phù hợp với '{opening_name_or_id}'.")
             
             # Tìm candidate
-            found_candidate_id, candidate_similarity = find_candidate_by_name_in_opening(
+            found_candidate_id, candidate_similarity = await asyncio.to_thread(
+                find_candidate_by_name_in_opening,
                 candidate_name,
                 opening_id,
                 BASE_API_KEY,
-                similarity_threshold=0.5
+                similarity_threshold=NAME_MATCH_THRESHOLD
             )
             
             if not found_candidate_id:
                 raise Exception(f"Không tìm thấy ứng viên phù hợp với tên '{candidate_name}' trong vị trí '{opening_name_matched}'.")
         
         # Gọi helper function để lấy offer letter
-        offer_data = get_offer_letter(found_candidate_id, BASE_API_KEY)
+        offer_data = await asyncio.to_thread(get_offer_letter, found_candidate_id, BASE_API_KEY)
         
         if not offer_data:
             return {
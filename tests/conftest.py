@@ -0,0 +1,6 @@
+import os
+import sys
+
+# app.py/server.py đọc BASE_API_KEY lúc import
+os.environ.setdefault('BASE_API_KEY', 'test-key')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
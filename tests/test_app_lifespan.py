@@ -0,0 +1,13 @@
+from fastapi.testclient import TestClient
+
+import app
+
+
+def test_lifespan_releases_pool_and_session(monkeypatch):
+    closed = []
+    monkeypatch.setattr(app, '_shutdown_pdf_executor', lambda: closed.append('pdf_executor'))
+    monkeypatch.setattr(app._SESSION, 'close', lambda: closed.append('session'))
+    with TestClient(app.app) as client:
+        assert client.get('/').status_code == 200
+        assert closed == []
+    assert closed == ['pdf_executor', 'session']
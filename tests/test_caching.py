@@ -0,0 +1,203 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cachetools import TTLCache
+
+import app
+import server
+
+
+@pytest.fixture
+def cache_name(monkeypatch):
+    monkeypatch.setitem(app._cache, 'test', TTLCache(maxsize=16, ttl=60))
+    return 'test'
+
+
+def test_get_cached_loads_each_key_once(cache_name):
+    calls = []
+    release = threading.Event()
+    
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+    
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(app._get_cached, cache_name, 'key', loader) for _ in range(8)]
+        threading.Timer(0.2, release.set).start()
+        results = [future.result(5) for future in futures]
+    
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert app._get_cached(cache_name, 'key', lambda: 'other') == 'value'
+
+
+def test_get_cached_does_not_serialize_different_keys(cache_name):
+    slow_started = threading.Event()
+    release = threading.Event()
+    
+    def slow_loader():
+        slow_started.set()
+        release.wait(5)
+        return 'slow'
+    
+    with ThreadPoolExecutor(2) as pool:
+        slow = pool.submit(app._get_cached, cache_name, 'slow', slow_loader)
+        assert slow_started.wait(5)
+        # Key khác của cùng cache không phải chờ loader đang chạy
+        fast = pool.submit(app._get_cached, cache_name, 'fast', lambda: 'fast')
+        assert fast.result(1) == 'fast'
+        release.set()
+        assert slow.result(5) == 'slow'
+
+
+def test_get_cached_shares_errors_and_does_not_cache(cache_name):
+    release = threading.Event()
+    
+    def failing_loader():
+        release.wait(5)
+        raise RuntimeError('boom')
+    
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(app._get_cached, cache_name, 'key', failing_loader) for _ in range(4)]
+        threading.Timer(0.2, release.set).start()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(5)
+    
+    assert app._get_cached(cache_name, 'key', lambda: 'ok') == 'ok'
+
+
+def test_get_cached_skips_none(cache_name):
+    assert app._get_cached(cache_name, 'key', lambda: None) is None
+    assert app._get_cached(cache_name, 'key', lambda: 'loaded') == 'loaded'
+
+
+class _FakeResponse:
+    def __init__(self, content):
+        self.content = content
+    
+    def raise_for_status(self):
+        pass
+
+
+def test_candidate_details_for_different_ids_do_not_queue(monkeypatch):
+    monkeypatch.setitem(app._cache, 'candidate_details', TTLCache(maxsize=16, ttl=60))
+    slow_started = threading.Event()
+    release = threading.Event()
+    
+    def fake_post(url, headers=None, data=None, timeout=None):
+        if data['id'] == 'slow':
+            slow_started.set()
+            release.wait(5)
+        return _FakeResponse(app._json_dumps({'code': 1, 'candidate': {'id': data['id'], 'name': data['id']}}))
+    
+    monkeypatch.setattr(app._SESSION, 'post', fake_post)
+    with ThreadPoolExecutor(2) as pool:
+        slow = pool.submit(app.get_candidate_details, 'slow', 'key', with_reviews=False)
+        assert slow_started.wait(5)
+        fast = pool.submit(app.get_candidate_details, 'fast', 'key', with_reviews=False)
+        assert fast.result(1)
+        release.set()
+        assert slow.result(5)
+
+
+def test_single_flight_runs_fn_once_per_key():
+    calls = []
+    release = threading.Event()
+    
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'result'
+    
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(server._single_flight, ('test', 'key'), fn) for _ in range(8)]
+        threading.Timer(0.2, release.set).start()
+        assert [future.result(5) for future in futures] == ['result'] * 8
+    assert len(calls) == 1
+    assert ('test', 'key') not in server._inflight
+
+
+def test_single_flight_shares_errors():
+    release = threading.Event()
+    
+    def fn():
+        release.wait(5)
+        raise RuntimeError('boom')
+    
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(server._single_flight, ('test', 'error'), fn) for _ in range(4)]
+        threading.Timer(0.2, release.set).start()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(5)
+    assert server._single_flight(('test', 'error'), lambda: 'ok') == 'ok'
+
+
+def test_get_or_refresh_serves_stale_and_refreshes_on_pool(monkeypatch):
+    monkeypatch.setitem(server._cache, 'test', {'data': 'old', 'timestamp': time.time() - server.CACHE_TTL - 1})
+    refreshed = threading.Event()
+    threads = []
+    
+    def loader():
+        threads.append(threading.current_thread().name)
+        refreshed.set()
+        return 'new'
+    
+    assert server._get_or_refresh('test', loader) == 'old'
+    assert refreshed.wait(5)
+    for _ in range(50):
+        if server._cache['test']['data'] == 'new' and 'test' not in server._refreshing:
+            break
+        time.sleep(0.01)
+    assert server._get_or_refresh('test', loader) == 'new'
+    assert len(threads) == 1 and threads[0].startswith('ThreadPoolExecutor')
+
+
+def test_uncached_jd_index_leaves_cached_index(monkeypatch):
+    cached = [{'id': '1', 'name': 'Backend'}]
+    fresh = [{'id': '1', 'name': 'Backend'}, {'id': '2', 'name': 'Frontend'}]
+    monkeypatch.setattr(server, 'get_job_descriptions', lambda api_key, use_cache=True: cached if use_cache else fresh)
+    monkeypatch.setitem(server._cache, 'jd_index', {'source': None, 'by_id': {}})
+    
+    cached_index = server.get_job_descriptions_indexed('key')
+    assert server.get_job_descriptions_indexed('key', use_cache=False) == {'1': fresh[0], '2': fresh[1]}
+    assert server._cache['jd_index']['source'] is cached
+    assert server.get_job_descriptions_indexed('key') is cached_index
+
+
+class _FakeHTTPResponse(_FakeResponse):
+    def __init__(self, content, status_code=200, headers=None):
+        super().__init__(content)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _opening(opening_id):
+    return {'id': opening_id, 'name': f'Opening {opening_id}', 'status': '10', 'content': f'<p>Mô tả công việc {opening_id}</p>'}
+
+
+def test_jd_refresh_after_miss_is_kept_for_next_lookup(monkeypatch):
+    for name in ('opening_list', 'job_descriptions'):
+        monkeypatch.setitem(app._cache, name, TTLCache(maxsize=16, ttl=60))
+    upstream = {'openings': [_opening('1')]}
+    calls = []
+    
+    def fake_post(url, headers=None, data=None, timeout=None):
+        calls.append(url)
+        return _FakeHTTPResponse(app._json_dumps(upstream))
+    
+    monkeypatch.setattr(app._SESSION, 'post', fake_post)
+    api_key = 'jd-refresh-key'
+    assert app.get_job_description_by_id('1', api_key)['id'] == '1'
+    
+    # Opening mới xuất hiện sau khi cache đã cũ hơn JD_REFRESH_MIN_INTERVAL
+    upstream['openings'].append(_opening('2'))
+    app._opening_list_fetched_at[api_key] = time.time() - app.JD_REFRESH_MIN_INTERVAL - 1
+    assert app.get_job_description_by_id('2', api_key)['id'] == '2'
+    fetches = len(calls)
+    assert app.get_job_description_by_id('2', api_key)['id'] == '2'
+    assert len(calls) == fetches
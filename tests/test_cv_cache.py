@@ -0,0 +1,53 @@
+import os
+import stat
+import time
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    path = str(tmp_path / 'cv')
+    monkeypatch.setattr(server, 'CV_CACHE_DIR', path)
+    return path
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_cv_cache_disabled_by_default(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, 'CV_CACHE_DIR', None)
+    server._write_cv_cache('https://cdn/cv.pdf', 'text')
+    assert server._read_cv_cache('https://cdn/cv.pdf') is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_cv_cache_files_are_private(cache_dir):
+    server._write_cv_cache('https://cdn/cv.pdf', 'Nguyễn Văn An')
+    assert server._read_cv_cache('https://cdn/cv.pdf') == 'Nguyễn Văn An'
+    assert mode(cache_dir) == 0o700
+    assert mode(server._cv_cache_path('https://cdn/cv.pdf')) == 0o600
+
+
+def test_cv_cache_deletes_expired_entry_on_read(cache_dir):
+    server._write_cv_cache('https://cdn/cv.pdf', 'text')
+    path = server._cv_cache_path('https://cdn/cv.pdf')
+    expired = os.path.getmtime(path) - server.CV_CACHE_TTL - 1
+    os.utime(path, (expired, expired))
+    assert server._read_cv_cache('https://cdn/cv.pdf') is None
+    assert not os.path.exists(path)
+
+
+def test_cv_cache_sweep_caps_file_count(cache_dir, monkeypatch):
+    monkeypatch.setattr(server, 'CV_CACHE_MAX_FILES', 2)
+    written_at = time.time() - 100
+    for i in range(4):
+        server._write_cv_cache(f'https://cdn/{i}.pdf', 'text')
+        os.utime(server._cv_cache_path(f'https://cdn/{i}.pdf'), (written_at + i, written_at + i))
+    server._sweep_cv_cache()
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        os.path.basename(server._cv_cache_path(f'https://cdn/{i}.pdf')) for i in (2, 3)
+    )
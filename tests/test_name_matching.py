@@ -0,0 +1,160 @@
+import pytest
+
+import app
+import server
+
+# Ngưỡng hiệu chỉnh riêng cho RapidFuzz và cho fallback TF-IDF char n-gram
+rapidfuzz_only = pytest.mark.skipif(not app.RAPIDFUZZ_AVAILABLE, reason='rapidfuzz chưa được cài')
+
+
+@pytest.fixture
+def tfidf_fallback(monkeypatch):
+    """Giả lập môi trường không có rapidfuzz: scorer TF-IDF và bộ ngưỡng tương ứng"""
+    pytest.importorskip('sklearn')
+    monkeypatch.setattr(app, 'RAPIDFUZZ_AVAILABLE', False)
+    name, title, stage = app.match_thresholds(False)
+    monkeypatch.setattr(app, 'NAME_MATCH_THRESHOLD', name)
+    monkeypatch.setattr(app, 'TITLE_MATCH_THRESHOLD', title)
+    monkeypatch.setattr(app, 'STAGE_MATCH_THRESHOLD', stage)
+
+
+def matches(query, names, threshold, **kwargs):
+    best_idx, similarity = app.best_name_match(query, names, **kwargs)
+    return names[best_idx] if similarity >= threshold else None
+
+
+@rapidfuzz_only
+@pytest.mark.parametrize('query, name', [
+    ('Nguyễn Văn An', 'nguyen van an'),
+    ('NGUYEN VAN AN', 'Nguyễn Văn An'),
+    ('Văn An Nguyễn', 'Nguyễn Văn An'),
+    ('Đỗ Thị  Hoa', 'Do Thi Hoa'),
+])
+def test_candidate_name_accepts_same_person(query, name):
+    assert matches(query, [name], app.NAME_MATCH_THRESHOLD, person_names=True) == name
+
+
+@rapidfuzz_only
+@pytest.mark.parametrize('query, name', [
+    ('Nguyễn Văn An', 'Nguyễn Văn Bình'),
+    ('Lê Minh', 'Lê Minh Tuấn'),
+    ('Nguyễn Thị Lan', 'Nguyễn Thị Lam'),
+    ('Trần Văn Nam', 'Nguyễn Văn Nam'),
+])
+def test_candidate_name_rejects_near_miss(query, name):
+    assert matches(query, [name], app.NAME_MATCH_THRESHOLD, person_names=True) is None
+
+
+@rapidfuzz_only
+@pytest.mark.parametrize('query, stage', [
+    ('Offer', 'Offered'),
+    ('interview', 'Interviewing'),
+    ('Tech test', 'Technical Test'),
+])
+def test_stage_accepts_variant(query, stage):
+    assert matches(query, [stage], app.STAGE_MATCH_THRESHOLD) == stage
+
+
+@rapidfuzz_only
+@pytest.mark.parametrize('query, stage', [
+    ('Offered', 'Hired'),
+    ('Technical Test', 'Culture Fit'),
+    ('Screening', 'Interview'),
+])
+def test_stage_rejects_unrelated(query, stage):
+    assert matches(query, [stage], app.STAGE_MATCH_THRESHOLD) is None
+
+
+@rapidfuzz_only
+def test_opening_title_threshold():
+    openings = ['Senior Backend Developer', 'Frontend Developer']
+    assert matches('backend', openings, app.TITLE_MATCH_THRESHOLD) == 'Senior Backend Developer'
+    assert matches('Mobile Developer', openings, app.TITLE_MATCH_THRESHOLD) is None
+
+
+@pytest.mark.parametrize('query, name', [
+    ('Nguyễn Văn An', 'nguyen van an'),
+    ('Văn An Nguyễn', 'Nguyễn Văn An'),
+    ('Đỗ Thị  Hoa', 'Do Thi Hoa'),
+])
+def test_fallback_candidate_name_accepts_same_person(tfidf_fallback, query, name):
+    assert matches(query, [name], app.NAME_MATCH_THRESHOLD, person_names=True) == name
+
+
+@pytest.mark.parametrize('query, name', [
+    ('Nguyễn Văn', 'Nguyễn Văn An'),
+    ('Nguyễn Văn An', 'Nguyễn Văn Bình'),
+    ('Trần Văn An', 'Nguyễn Văn An'),
+])
+def test_fallback_candidate_name_rejects_near_miss(tfidf_fallback, query, name):
+    assert matches(query, [name], app.NAME_MATCH_THRESHOLD, person_names=True) is None
+
+
+def test_fallback_opening_title_threshold(tfidf_fallback):
+    openings = ['Backend Engineer', 'Data Engineer', 'Data Analyst']
+    assert matches('data engineer', openings, app.TITLE_MATCH_THRESHOLD) == 'Data Engineer'
+    assert matches('Data Engineer', ['Backend Engineer', 'Data Analyst'], app.TITLE_MATCH_THRESHOLD) is None
+    assert matches('DevOps Engineer', openings, app.TITLE_MATCH_THRESHOLD) is None
+
+
+def test_fallback_stage_threshold(tfidf_fallback):
+    stages = ['Offered', 'Hired', 'Rejected']
+    assert matches('Hire', stages, app.STAGE_MATCH_THRESHOLD) == 'Hired'
+    assert matches('Offer', stages, app.STAGE_MATCH_THRESHOLD) == 'Offered'
+    assert matches('Screening', stages + ['Interview'], app.STAGE_MATCH_THRESHOLD) is None
+    assert matches('Offered', ['Hired', 'Rejected'], app.STAGE_MATCH_THRESHOLD) is None
+
+
+@rapidfuzz_only
+def test_server_thresholds_match_app():
+    assert (server.NAME_MATCH_THRESHOLD, server.TITLE_MATCH_THRESHOLD, server.STAGE_MATCH_THRESHOLD) == (
+        app.NAME_MATCH_THRESHOLD, app.TITLE_MATCH_THRESHOLD, app.STAGE_MATCH_THRESHOLD
+    )
+
+
+@rapidfuzz_only
+def test_server_candidate_names_reject_near_miss():
+    names = ['Nguyễn Văn Bình', 'Lê Minh Tuấn', 'Trần Thị Hoa']
+    results = server.best_name_matches(['Nguyễn Văn An', 'Lê Minh', 'tran thi hoa'], names)
+    accepted = [names[idx] if similarity >= server.NAME_MATCH_THRESHOLD else None for idx, similarity in results]
+    assert accepted == [None, None, 'Trần Thị Hoa']
+
+
+@rapidfuzz_only
+def test_server_stage_rejects_unrelated():
+    stages = ['Hired', 'Culture Fit']
+    best_idx, similarity = server.best_name_match('Offered', stages)
+    assert similarity < server.STAGE_MATCH_THRESHOLD
+    best_idx, similarity = server.best_name_match('Offer', ['Hired', 'Offered'])
+    assert best_idx == 1 and similarity >= server.STAGE_MATCH_THRESHOLD
+
+
+@pytest.fixture
+def sheet_rows(monkeypatch, request):
+    rows = [
+        {'candidate_id': 1, 'Tên ứng viên': 'Nguyễn Thị Lan', 'Công việc ứng tuyển': 'Backend Developer'},
+        {'candidate_id': 2, 'Tên ứng viên': 'Nguyễn Thị Hoa', 'Công việc ứng tuyển': 'Backend Developer'},
+        {'candidate_id': 3, 'Tên ứng viên': 'Trần Văn Nam', 'Công việc ứng tuyển': 'Frontend Developer'},
+        {'candidate_id': 4, 'Tên ứng viên': 'Trần Văn Nam', 'Công việc ứng tuyển': 'Data Analyst'},
+    ]
+    monkeypatch.setattr(app, 'GOOGLE_SHEET_SCRIPT_URL', f'sheet://{request.node.name}')
+    monkeypatch.setattr(app, 'get_all_test_results_from_google_sheet', lambda use_cache=True: rows)
+    return rows
+
+
+def test_sheet_lookup_requires_same_candidate_name(sheet_rows):
+    candidate_id, _, _ = app.find_candidate_id_in_google_sheet('Nguyễn Thị Lam', 'Backend Developer')
+    assert candidate_id is None
+
+
+def test_sheet_lookup_matches_opening_for_same_name(sheet_rows):
+    assert app.find_candidate_id_in_google_sheet('nguyen thi hoa', 'Backend Developer')[0] == '2'
+    assert app.find_candidate_id_in_google_sheet('tran van nam', 'data analyst')[0] == '4'
+    assert app.find_candidate_id_in_google_sheet('Trần Văn Nam', 'Kế toán')[0] is None
+
+
+@rapidfuzz_only
+def test_find_test_by_name_rejects_unrelated():
+    tests = [{'test_name': 'English Test'}, {'test_name': 'Logic Test'}]
+    assert app.find_test_by_name(tests, 'logic test')[0] == tests[1]
+    assert app.find_test_by_name(tests, 'IQ Test')[0] is None
@@ -0,0 +1,126 @@
+from io import BytesIO
+
+import pytest
+from bs4 import BeautifulSoup
+from docx import Document
+
+import app
+import server
+
+JD_HTML = (
+    '<div><h2>Mô tả công việc</h2><p>Phát triển&nbsp;API &amp; dịch vụ <b>backend</b></p>'
+    '<ul><li>Python</li><li>SQL</li></ul><p>Lương:\t&lt;thỏa thuận&gt;</p></div>'
+)
+LINKS_HTML = (
+    '<p>Offer <a href="https://cdn.base.vn/offer.pdf?v=1">Thư mời nhận việc</a>'
+    ' <a href="https://cdn.base.vn/anh.png">ảnh</a>'
+    ' <a href="https://cdn.base.vn/files/hop-dong.docx"></a></p>'
+)
+
+
+def make_docx():
+    doc = Document()
+    doc.add_paragraph('Nguyễn Văn An')
+    paragraph = doc.add_paragraph('Kinh nghiệm:')
+    paragraph.add_run().add_tab()
+    paragraph.add_run('5 năm')
+    paragraph.add_run().add_break()
+    paragraph.add_run('Python, SQL')
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = 'Ô trong bảng'
+    doc.add_paragraph('Kỹ năng')
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def test_docx_text_matches_python_docx_paragraphs():
+    data = make_docx()
+    expected = '\n'.join(p.text for p in Document(BytesIO(data)).paragraphs).strip()
+    assert server.extract_text_from_docx(BytesIO(data)) == expected
+
+
+def test_docx_invalid_file_returns_none():
+    assert server.extract_text_from_docx(BytesIO(b'not a docx')) is None
+
+
+@pytest.fixture
+def selectolax_backend():
+    pytest.importorskip('selectolax.lexbor')
+    assert app.SELECTOLAX_AVAILABLE
+
+
+@pytest.fixture
+def lxml_backend():
+    pytest.importorskip('lxml.html')
+    assert app.LXML_AVAILABLE and server.LXML_AVAILABLE
+
+
+def jd_text_expected():
+    return app._HSPACE_RE.sub(' ', BeautifulSoup(JD_HTML, 'html.parser').get_text())
+
+
+def test_html_to_text_selectolax_matches_beautifulsoup(selectolax_backend):
+    assert app.html_to_text(JD_HTML) == jd_text_expected()
+
+
+def test_html_to_text_lxml_matches_beautifulsoup(lxml_backend, monkeypatch):
+    monkeypatch.setattr(app, 'SELECTOLAX_AVAILABLE', False)
+    assert app.html_to_text(JD_HTML) == jd_text_expected()
+
+
+def test_html_to_text_beautifulsoup_fallback(monkeypatch):
+    monkeypatch.setattr(app, 'SELECTOLAX_AVAILABLE', False)
+    monkeypatch.setattr(app, 'LXML_AVAILABLE', False)
+    assert app.html_to_text(JD_HTML) == jd_text_expected()
+
+
+EXPECTED_LINKS = [
+    ('https://cdn.base.vn/offer.pdf?v=1', 'Thư mời nhận việc'),
+    ('https://cdn.base.vn/files/hop-dong.docx', 'hop-dong.docx'),
+]
+
+
+def test_app_find_files_selectolax_matches_fallback(selectolax_backend, monkeypatch):
+    assert app.find_files_in_html(LINKS_HTML) == EXPECTED_LINKS
+    monkeypatch.setattr(app, 'SELECTOLAX_AVAILABLE', False)
+    assert app.find_files_in_html(LINKS_HTML) == EXPECTED_LINKS
+
+
+def test_server_find_files_lxml_matches_fallback(lxml_backend, monkeypatch):
+    assert server.find_files_in_html(LINKS_HTML) == EXPECTED_LINKS
+    monkeypatch.setattr(server, 'LXML_AVAILABLE', False)
+    assert server.find_files_in_html(LINKS_HTML) == EXPECTED_LINKS
+
+
+def test_remove_html_tags_lxml_path_matches_regex(lxml_backend, monkeypatch):
+    html = JD_HTML * (server.LXML_TEXT_MIN_LENGTH // len(JD_HTML) + 1)
+    fast = server.remove_html_tags(html)
+    monkeypatch.setattr(server, 'LXML_AVAILABLE', False)
+    assert server.remove_html_tags(html) == fast
+
+
+FEEDBACK_HTML = (
+    '<p>Tốt</p><p>Cần cải thiện</p><ul><li>Python</li><li>SQL</li></ul>'
+    'Good<br>Needs work &amp; <b>giao</b> tiếp<!-- ghi chú --><script>var x = 1;</script>'
+)
+
+
+def feedback_expected():
+    expected = " ".join(BeautifulSoup(FEEDBACK_HTML, 'html.parser').stripped_strings)
+    assert expected == 'Tốt Cần cải thiện Python SQL Good Needs work & giao tiếp'
+    return expected
+
+
+def test_extract_message_selectolax_path_matches_beautifulsoup(selectolax_backend):
+    assert app.extract_message([{'content': FEEDBACK_HTML}]) == feedback_expected()
+
+
+def test_extract_message_lxml_path_keeps_words_apart(lxml_backend, monkeypatch):
+    monkeypatch.setattr(app, 'SELECTOLAX_AVAILABLE', False)
+    assert app.extract_message([{'content': FEEDBACK_HTML}]) == feedback_expected()
+
+
+def test_extract_message_beautifulsoup_fallback(monkeypatch):
+    monkeypatch.setattr(app, 'SELECTOLAX_AVAILABLE', False)
+    monkeypatch.setattr(app, 'LXML_AVAILABLE', False)
+    assert app.extract_message([{'content': FEEDBACK_HTML}]) == feedback_expected()